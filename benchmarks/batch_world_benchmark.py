@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Benchmark of the BatchWorld against the World: time steps simulated per second for a growing number of episodes, after
+checking that each episode of the BatchWorld follows the World driven by the same plans and random draws.
+
+Usage: python benchmarks/batch_world_benchmark.py [number_of_steps]
+"""
+import sys
+import time
+import random
+import numpy as np
+
+from common import load_simulation_params
+from dt_simulator.world import World
+from dt_simulator.batch_world import BatchWorld
+
+
+class PythonRandom(object):
+    # Draws of the random module, in the order of the World (one per episode at each step)
+    def random_sample(self, size):
+        return np.array([random.random() for _ in range(size)])
+
+
+def random_plans(number_plans, rng):
+    return [list(rng.uniform(-0.5, 0.5, rng.randint(0, 8))) for _ in range(number_plans)]
+
+
+def check_against_world(params, number_episodes, number_steps):
+    # Steps the BatchWorld and number_episodes Worlds with the same plans (every 5 steps) and random draws, returns the
+    # largest pose difference and the number of differing safety statuses and ground types
+    rng = np.random.RandomState(0)
+    random.seed(0)
+    batch_world = BatchWorld(*params, number_episodes=number_episodes, rng=PythonRandom())
+    worlds = [World(*params) for _ in range(number_episodes)]
+    pose_error = 0.0
+    differences = 0
+    for k in range(number_steps):
+        if k % 5 == 0:
+            plans = random_plans(number_episodes, rng)
+            batch_world.update_our_duckie_plans(plans)
+            for world, plan in zip(worlds, plans):
+                world.update_our_duckie_plan(plan)
+        # One random draw per episode, in the order of the episodes
+        state = random.getstate()
+        batch_world.step()
+        random.setstate(state)
+        for episode, world in enumerate(worlds):
+            world.step()
+            pose_error = max(pose_error, np.abs(np.array(world.my_bot.pos()) - batch_world.our_poses[episode]).max(), np.abs(np.array(world.other_bot.pos()) - batch_world.other_poses[episode]).max())
+            differences += (world.my_bot_safety_status.value != batch_world.safety_statuses[episode]) + (world.my_bot_ground_type.value != batch_world.ground_types[episode])
+    return pose_error, differences
+
+
+def time_world(params, number_steps):
+    world = World(*params)
+    world.update_our_duckie_plan([0.1]*number_steps)
+    start = time.time()
+    for _ in range(number_steps):
+        world.step()
+    return (time.time() - start) / number_steps
+
+
+def time_batch_world(params, number_episodes, number_steps):
+    batch_world = BatchWorld(*params, number_episodes=number_episodes)
+    batch_world.update_our_duckie_plans([[0.1]*number_steps]*number_episodes)
+    start = time.time()
+    for _ in range(number_steps):
+        batch_world.step()
+    return (time.time() - start) / number_steps
+
+
+if __name__ == '__main__':
+    number_steps = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    sim_parameters, world_params, our_duckie_params, other_duckie_params, _ = load_simulation_params()
+    params = (sim_parameters, world_params, our_duckie_params, other_duckie_params)
+
+    pose_error, differences = check_against_world(params, 20, number_steps)
+    print("BatchWorld against World (20 episodes, %d steps): max pose error %.1e, %d different statuses" % (number_steps, pose_error, differences))
+
+    world_time = time_world(params, number_steps)
+    print("World: %.1f us per step, %.0f episode steps/s" % (1e6 * world_time, 1 / world_time))
+    for number_episodes in [1, 10, 100, 1000, 10000, 100000]:
+        batch_time = time_batch_world(params, number_episodes, number_steps)
+        print("BatchWorld %6d episodes: %8.1f us per step, %10.0f episode steps/s (x%.0f)" % (number_episodes, 1e6 * batch_time, number_episodes / batch_time, world_time * number_episodes / batch_time))
@@ -0,0 +1,61 @@
+"""
+Helpers shared by the benchmarks: parameters read from config/ the same way as the nodes do, and observation messages.
+"""
+import os
+import sys
+import yaml
+
+PKG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PKG_DIR, "include"))
+
+from pathplan_uncertainty.msg import Pose2DTimeStep, Observation
+from dt_comm.enums import Ground
+
+
+def load_config(name):
+    with open(os.path.join(PKG_DIR, "config", name)) as f:
+        return yaml.safe_load(f)
+
+
+def load_params():
+    agent_cfg = load_config("agent.yaml")["agent"]
+    sim_cfg = load_config("sim.yaml")["sim"]
+    bots_cfg = load_config("duckiebots.yaml")["duckiebots"]
+    reward_cfg = load_config("rewards.yaml")["reward"]
+    other_duckie = bots_cfg[sim_cfg["other_duckie_type"]]
+
+    predictor_cfg = agent_cfg["predictor"]
+    planner_cfg = agent_cfg["planner"]
+    agent_params = {"time_horizon": predictor_cfg["time_horizon"], "vel_resolution": predictor_cfg["vel_resolution"], "y_resolution": predictor_cfg["y_resolution"], "y_horizon": predictor_cfg["y_horizon"], "comp_time_mean": agent_cfg["computation_time"]["mean"], "comp_time_std_dev": agent_cfg["computation_time"]["std_dev"], "predictor_type": predictor_cfg["type"], "warm_start": predictor_cfg["warm_start"]}
+    for name, value in planner_cfg.items():
+        agent_params["planner_" + name] = value
+    sim_params = {"dt": sim_cfg["dt"], "road_width": sim_cfg["world"]["road"]["width"], "other_duckie_type": sim_cfg["other_duckie_type"], "other_duckie_max_acceleration": other_duckie["max_acceleration"], "other_duckie_max_velocity": other_duckie["max_velocity"], "other_duckie_min_velocity": other_duckie["min_velocity"]}
+    reward_params = {Ground.RIGHT_LANE: reward_cfg["type_right_lane"], Ground.WRONG_LANE: reward_cfg["type_wrong_lane"], Ground.PARTIALLY_OUT_OF_ROAD: reward_cfg["type_partially_out"], Ground.LOST: reward_cfg["type_lost"]}
+    return agent_params, sim_params, bots_cfg["our_duckie"], other_duckie, reward_params
+
+
+def load_simulation_params():
+    # Parameters of the simulator and manager nodes: sim parameters, world parameters, our and other duckie parameters, rewards
+    sim_cfg = load_config("sim.yaml")["sim"]
+    bots_cfg = load_config("duckiebots.yaml")["duckiebots"]
+    reward_cfg = load_config("rewards.yaml")["reward"]
+    sim_parameters = {"dt": sim_cfg["dt"], "dt_in_sim": sim_cfg["dt_in_sim"]}
+    world_params = {"road_width": sim_cfg["world"]["road"]["width"]}
+    other_duckie = dict(bots_cfg[sim_cfg["other_duckie_type"]], type=sim_cfg["other_duckie_type"])
+    rewards = {"fine": reward_cfg["status_fine"], "collision": reward_cfg["status_collision"], "right_lane": reward_cfg["type_right_lane"], "wrong_lane": reward_cfg["type_wrong_lane"], "part_out": reward_cfg["type_partially_out"], "lost": reward_cfg["type_lost"]}
+    return sim_parameters, world_params, bots_cfg["our_duckie"], other_duckie, rewards
+
+
+def make_observation(our_duckie, other_duckie):
+    obs_msg = Observation()
+    obs_msg.our_duckie_pose = Pose2DTimeStep()
+    obs_msg.our_duckie_pose.time = 0.0
+    obs_msg.our_duckie_pose.x, obs_msg.our_duckie_pose.y, obs_msg.our_duckie_pose.theta = our_duckie["start_pose"]
+    obs_msg.our_duckie_velocity = our_duckie["velocity"]
+    obs_msg.our_duckie_radius = our_duckie["radius"]
+    obs_msg.other_duckie_pose = Pose2DTimeStep()
+    obs_msg.other_duckie_pose.time = 0.0
+    obs_msg.other_duckie_pose.x, obs_msg.other_duckie_pose.y, obs_msg.other_duckie_pose.theta = other_duckie["start_pose"]
+    obs_msg.other_duckie_velocity = other_duckie["velocity"]
+    obs_msg.other_duckie_radius = other_duckie["radius"]
+    return obs_msg
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Benchmark of the Dubins solvers: throughput in pairs per second of the scalar solver (dubins_path_parameters) and of the
+batch solver (dubins_path_parameters_batch), after checking that the batch solver gives the same words, segment lengths
+and costs as the scalar one.
+
+Usage: python benchmarks/dubins_benchmark.py [number_of_pairs]
+"""
+import os
+import sys
+import math
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "include", "dt_agent"))
+
+import dubins_path_planning
+from dubins_path_planning import WORDS
+
+
+def random_pairs(number_pairs, seed=0):
+    rng = np.random.RandomState(seed)
+    starts = [rng.uniform(-20, 20, number_pairs), rng.uniform(0, 40, number_pairs), rng.uniform(-math.pi, math.pi, number_pairs)]
+    ends = [rng.uniform(-20, 20, number_pairs), rng.uniform(0, 40, number_pairs), rng.uniform(-math.pi, math.pi, number_pairs)]
+    # Short distances, where the RLR and LRL words are the shortest ones
+    ends[0][::4] = starts[0][::4] + rng.uniform(-1, 1, len(starts[0][::4]))
+    ends[1][::4] = starts[1][::4] + rng.uniform(-1, 1, len(starts[0][::4]))
+    return starts, ends
+
+
+def check(starts, ends, curvature):
+    words, lengths, costs = dubins_path_planning.dubins_path_parameters_batch(starts[0], starts[1], starts[2], ends[0], ends[1], ends[2], curvature)
+    max_error = 0.0
+    for k in range(len(words)):
+        scalar_lengths, mode, cost = dubins_path_planning.dubins_path_parameters(starts[0][k], starts[1][k], starts[2][k], ends[0][k], ends[1][k], ends[2][k], curvature)
+        word = WORDS.index(mode)
+        if words[k] != word:
+            # Equal costs up to rounding can select another word
+            assert abs(costs[k] - cost) < 1e-9, "pair %d: %s instead of %s" % (k, "".join(WORDS[words[k]]), "".join(WORDS[word]))
+            continue
+        max_error = max(max_error, abs(costs[k] - cost), np.abs(lengths[k] - scalar_lengths).max())
+    return max_error, np.bincount(words, minlength=len(WORDS))
+
+
+if __name__ == '__main__':
+    number_pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    curvature = 1.0
+
+    starts, ends = random_pairs(min(number_pairs, 20000), seed=1)
+    max_error, word_counts = check(starts, ends, curvature)
+    print("batch vs scalar on %d pairs: max error %.2e, words %s" % (len(starts[0]), max_error, ", ".join("%s %d" % ("".join(word), count) for word, count in zip(WORDS, word_counts))))
+
+    starts, ends = random_pairs(number_pairs)
+    scalar_pairs = min(number_pairs, 20000)
+    start = time.time()
+    for k in range(scalar_pairs):
+        dubins_path_planning.dubins_path_parameters(starts[0][k], starts[1][k], starts[2][k], ends[0][k], ends[1][k], ends[2][k], curvature)
+    scalar_rate = scalar_pairs / (time.time() - start)
+
+    print("scalar:                  %12.0f pairs/s" % scalar_rate)
+    for batch_size in [10, 100, 1000, number_pairs]:
+        start = time.time()
+        for first in range(0, number_pairs, batch_size):
+            batch = slice(first, first + batch_size)
+            dubins_path_planning.dubins_path_parameters_batch(starts[0][batch], starts[1][batch], starts[2][batch], ends[0][batch], ends[1][batch], ends[2][batch], curvature)
+        rate = number_pairs / (time.time() - start)
+        print("batch of %7d:        %12.0f pairs/s (x%.1f)" % (batch_size, rate, rate / scalar_rate))
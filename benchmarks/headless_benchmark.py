@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+"""
+Episodes run by the headless driver: the simulator, the agent and the manager wired in-process, without ROS topics nor
+rospy.sleep, with the parameters of config/.
+
+Usage: python benchmarks/headless_benchmark.py [number_of_episodes] [episode_steps]
+
+10 episodes of 100 time steps by default.
+"""
+import sys
+import time
+
+from common import load_params, load_simulation_params
+from dt_agent.agent import Agent
+from dt_simulator.headless import HeadlessSimulation
+
+
+if __name__ == '__main__':
+    number_episodes = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    episode_steps = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    agent_params, sim_params, our_duckie, _, reward_params = load_params()
+    sim_parameters, world_params, our_duckie_params, other_duckie_params, rewards = load_simulation_params()
+
+    agent = Agent(agent_params, sim_params, our_duckie, reward_params)
+    simulation = HeadlessSimulation(sim_parameters, world_params, our_duckie_params, other_duckie_params, agent, rewards)
+    start = time.time()
+    scores = simulation.run_episodes(number_episodes, episode_steps)
+    elapsed = time.time() - start
+    agent.planner.close()
+
+    print("%d episodes of %d time steps in %.2f s: %.2f episodes/s, %.0f simulated time steps/s (%.0fx real time)" % (number_episodes, episode_steps, elapsed, number_episodes / elapsed, number_episodes * episode_steps / elapsed, number_episodes * episode_steps * sim_parameters["dt"] / elapsed))
+    print("score: mean %.1f, min %d, max %d" % (sum(scores) / float(len(scores)), min(scores), max(scores)))
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+Scaling benchmark of the root parallel mcts_array planner, from 1 worker to the number of cores.
+
+Usage: python benchmarks/mcts_benchmark.py [max_number_of_workers]
+
+With several workers, repeated fixed budget searches are checked to give each worker exactly worker_budget visits.
+"""
+import sys
+import multiprocessing
+
+from common import load_params, make_observation
+from dt_agent.predictor import PredictorDensePropagation
+from dt_agent.mcts_array import mctsArrayPlanner
+
+
+def check_worker_visits(planner, goal, obs_msg, number_searches=3):
+    # Each fixed budget search of a worker starts from an empty tree and transposition table: whatever the searches run
+    # before by the pool, its root children visits sum to worker_budget plus the initial visit of each expanded child
+    for _ in range(number_searches):
+        planner.computePlan(goal, obs_msg)
+        for root_visits in planner.search_stats["worker_root_visits"]:
+            expected = planner.worker_budget + sum(1 for visits in root_visits if visits > 0)
+            assert sum(root_visits) == expected, "worker root children visits %s do not sum to %d" % (root_visits, expected)
+
+
+if __name__ == '__main__':
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else multiprocessing.cpu_count()
+    agent_params, sim_params, our_duckie, other_duckie, reward_params = load_params()
+    obs_msg = make_observation(our_duckie, other_duckie)
+    goal = [0, obs_msg.our_duckie_pose.y + 8]
+    predictor = PredictorDensePropagation(agent_params, sim_params)
+    predictor.predict(obs_msg)
+    time_budget = agent_params["planner_deadline_ms"]/1000.0
+
+    print("worker_budget: %d iterations, deadline: %d ms" % (agent_params["planner_worker_budget"], agent_params["planner_deadline_ms"]))
+    print("workers | fixed budget: time (ms), iterations/s | deadline: iterations, iterations/s, max depth")
+    for workers in range(1, max_workers + 1):
+        planner = mctsArrayPlanner(predictor, dict(agent_params, planner_workers=workers, planner_reuse_subtree=False), sim_params, our_duckie, reward_params)
+        if workers > 1:
+            planner.computePlan(goal, obs_msg)                  # Starting the pool
+        planner.computePlan(goal, obs_msg)
+        budget_stats = planner.search_stats
+        planner.computePlan(goal, obs_msg, time_budget)
+        deadline_stats = planner.search_stats
+        if workers > 1:
+            check_worker_visits(planner, goal, obs_msg)
+        planner.close()
+        print("%7d | %10.1f %12.0f | %10d %12.0f %4d" % (workers, 1000*budget_stats["time"], budget_stats["iterations_per_second"], deadline_stats["iterations"], deadline_stats["iterations_per_second"], deadline_stats["max_depth"]))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Benchmark of the predictors: wall time per predict() call, at the resolutions given in config/agent.yaml.
+
+Usage: python benchmarks/predictor_benchmark.py [number_of_repetitions]
+"""
+import sys
+import time
+import random
+import numpy as np
+
+from common import load_params, make_observation
+from dt_agent.predictor import PredictorDiscretePropagation, PredictorDensePropagation
+
+
+def check_against_discrete(agent_params, sim_params, our_duckie, other_duckie, tolerance=0.05):
+    # Largest difference between the collision probabilities of both predictors over the time horizon, for observed velocities
+    # on the velocity bins (the predictions are then the same) and in between (the dense one differs by at most tolerance)
+    obs_msg = make_observation(our_duckie, other_duckie)
+    discrete = PredictorDiscretePropagation(agent_params, sim_params)
+    dense = PredictorDensePropagation(dict(agent_params, warm_start=False), sim_params)
+    times = np.arange(0, agent_params["time_horizon"], sim_params["dt"])
+    errors = {}
+    for on_bins, velocities in [(True, dense.vel_bins), (False, (dense.vel_bins[:-1] + dense.vel_bins[1:])/2)]:
+        errors[on_bins] = 0.0
+        for velocity in velocities:
+            obs_msg.other_duckie_velocity = velocity
+            discrete.predict(obs_msg)
+            dense.predict(obs_msg)
+            for t in times:
+                errors[on_bins] = max(errors[on_bins], abs(discrete.get_collision_probability(-0.5, 5.0, t, our_duckie["radius"]) - dense.get_collision_probability(-0.5, 5.0, t, our_duckie["radius"])))
+    assert errors[True] < 1e-6, "dense prediction different from the discrete one on the velocity bins: %.4f" % errors[True]
+    assert errors[False] < tolerance, "dense prediction different from the discrete one between the velocity bins: %.4f" % errors[False]
+    return errors[True], errors[False]
+
+
+def time_predict(predictor, obs_msg, repetitions):
+    start = time.time()
+    for _ in range(repetitions):
+        predictor.predict(obs_msg)
+    return (time.time() - start)/repetitions
+
+
+if __name__ == '__main__':
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    agent_params, sim_params, our_duckie, other_duckie, _ = load_params()
+    obs_msg = make_observation(our_duckie, other_duckie)
+
+    print("time_horizon: %.1f s, dt: %.2f s, y_resolution: %.2f m, y_horizon: %.1f m, vel_resolution: %.2f m/s" % (agent_params["time_horizon"], sim_params["dt"], agent_params["y_resolution"], agent_params["y_horizon"], agent_params["vel_resolution"]))
+
+    discrete = PredictorDiscretePropagation(agent_params, sim_params)
+    dense = PredictorDensePropagation(dict(agent_params, warm_start=False), sim_params)
+    discrete_time = time_predict(discrete, obs_msg, repetitions)
+    dense_time = time_predict(dense, obs_msg, repetitions)
+
+    print("discrete_propagation: %10.3f ms per predict" % (1000*discrete_time))
+    print("dense_propagation:    %10.3f ms per predict (x%.1f)" % (1000*dense_time, discrete_time/dense_time))
+
+    # Sanity check: both predictors should give similar collision probabilities
+    for t in [1.0, 3.0, 5.0]:
+        print("collision probability at (-0.5, 5.0) at t = %.1f s: discrete %.4f, dense %.4f" % (t, discrete.get_collision_probability(-0.5, 5.0, t, our_duckie["radius"]), dense.get_collision_probability(-0.5, 5.0, t, our_duckie["radius"])))
+
+    on_bins_error, between_bins_error = check_against_discrete(agent_params, sim_params, our_duckie, other_duckie)
+    print("largest collision probability difference with the discrete predictor: %.1e for velocities on the bins, %.4f in between" % (on_bins_error, between_bins_error))
+
+    # Warm start: replanning along an episode, the other duckie coming towards us with a changing velocity
+    observations = []
+    for k in range(50):
+        obs_k = make_observation(our_duckie, other_duckie)
+        obs_k.our_duckie_pose.time = obs_k.other_duckie_pose.time = k*sim_params["dt"]*agent_params["comp_time_mean"]
+        obs_k.other_duckie_pose.y = other_duckie["start_pose"][1] - 0.15*k
+        obs_k.other_duckie_velocity = random.uniform(other_duckie["min_velocity"], other_duckie["max_velocity"])
+        observations.append(obs_k)
+
+    warm = PredictorDensePropagation(dict(agent_params, warm_start=True), sim_params)
+    cold_time = sum(time_predict(dense, obs_k, 1) for obs_k in observations)/len(observations)
+    warm_time = sum(time_predict(warm, obs_k, 1) for obs_k in observations)/len(observations)
+    print("dense_propagation over an episode, cold: %10.3f ms per predict" % (1000*cold_time))
+    print("dense_propagation over an episode, warm: %10.3f ms per predict (x%.1f), %s" % (1000*warm_time, cold_time/warm_time, warm.get_warm_start_stats()))
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Benchmark of the nearest and near nodes queries of the RRT* Dubins planner: spatial hash index against vectorized linear scans
+of the node arrays.
+
+Usage: python benchmarks/rrt_benchmark.py [maxIter ...]
+
+The queries are timed on random trees from 60 to 32000 nodes. Planning is timed for the given maxIter values
+(60, 250, 1000 and 2000 by default, add larger ones such as 8000 to reach the trees where the spatial hash sorts the nodes).
+"""
+import os
+import sys
+import math
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "include", "dt_agent"))
+
+from rrt_star_dubins_planner import RRT, Node, NodeArrays
+from spatial_index import SpatialHash
+
+START = [0.0, 0.0, math.pi / 2]
+GOAL = [0.0, 30.0, math.pi / 2]
+RAND_AREA_X = [-20.0, 20.0]
+RAND_AREA_Y = [0.0, 40.0]
+OBSTACLES = [[(-0.5, 6.0 - 0.3 * k, 0.3) for k in range(10)]]
+
+
+def make_rrt(maxIter, indexCellSize):
+    return RRT(START, GOAL, OBSTACLES, RAND_AREA_X, RAND_AREA_Y, RAND_AREA_X[1] - RAND_AREA_X[0], RAND_AREA_Y[1], 0.1, maxIter=maxIter, indexCellSize=indexCellSize)
+
+
+def time_queries(number_nodes, indexCellSize, number_queries=200):
+    # Grows a tree of random nodes (with the index kept up to date as in Planning), then times nearest and near queries
+    random.seed(0)
+    rrt = make_rrt(number_nodes, indexCellSize)
+    rrt.nodes = NodeArrays()
+    rrt.nodes.append(rrt.start)
+    rrt.index = None
+    start = time.time()
+    if indexCellSize is not None:
+        rrt.index = SpatialHash(indexCellSize)
+        rrt.index.insert(rrt.start.x, rrt.start.y, rrt.start.yaw)
+    for _ in range(number_nodes - 1):
+        node = rrt.get_random_point()
+        rrt.nodes.append(node)
+        if rrt.index is not None:
+            rrt.index.insert(node.x, node.y, node.yaw)
+    build_time = time.time() - start
+
+    queries = [Node(random.uniform(*RAND_AREA_X), random.uniform(*RAND_AREA_Y), random.uniform(-math.pi, math.pi)) for _ in range(number_queries)]
+    start = time.time()
+    nearest = [rrt.GetNearestListIndex(rrt.nodes, query) for query in queries]
+    nearest_time = (time.time() - start) / number_queries
+    start = time.time()
+    near = [rrt.find_near_nodes(query) for query in queries]
+    near_time = (time.time() - start) / number_queries
+    return build_time, nearest_time, near_time, nearest, near
+
+
+def time_planning(maxIter, indexCellSize):
+    random.seed(0)
+    rrt = make_rrt(maxIter, indexCellSize)
+    start = time.time()
+    path = rrt.Planning()
+    return time.time() - start, rrt.nodes, path
+
+
+if __name__ == '__main__':
+    iterations = [int(arg) for arg in sys.argv[1:]] or [60, 250, 1000, 2000]
+
+    print("Queries (per query), vectorized linear scan vs spatial hash:")
+    for number_nodes in [60, 250, 1000, 2000, 4000, 8000, 16000, 32000]:
+        _, linear_nearest, linear_near, nearest, near = time_queries(number_nodes, None)
+        build, index_nearest, index_near, index_nearest_result, index_near_result = time_queries(number_nodes, 1.0)
+        assert nearest == index_nearest_result and near == index_near_result, "the spatial hash gives different nodes"
+        print("  %5d nodes: nearest %8.1f us / %8.1f us (x%.1f), near %8.1f us / %8.1f us (x%.1f), index build %.1f ms" % (number_nodes, 1e6 * linear_nearest, 1e6 * index_nearest, linear_nearest / index_nearest, 1e6 * linear_near, 1e6 * index_near, linear_near / index_near, 1000 * build))
+
+    print("Planning, vectorized linear scan vs spatial hash:")
+    for maxIter in iterations:
+        linear_time, linear_nodes, _ = time_planning(maxIter, None)
+        index_time, index_nodes, _ = time_planning(maxIter, 1.0)
+        same = len(linear_nodes) == len(index_nodes) and all((getattr(linear_nodes, name)[:len(index_nodes)] == getattr(index_nodes, name)[:len(index_nodes)]).all() for name in ["x", "y", "yaw", "parent"])
+        print("  maxIter %5d: %8.2f s / %8.2f s, %d nodes, same tree: %s" % (maxIter, linear_time, index_time, len(index_nodes), same))
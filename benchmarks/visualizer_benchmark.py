@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Benchmark of the Visualizer, in frames per second at the image parameters of config/sim.yaml: road image drawn once and bots
+drawn with NumPy masks, against the road drawn at each frame and bots drawn pixel by pixel (the previous implementation,
+kept below for the comparison). The images of both are checked to be identical.
+
+Usage: python benchmarks/visualizer_benchmark.py [number_of_frames]
+"""
+import sys
+import math
+import time
+import numpy as np
+
+from common import load_config, load_simulation_params
+from dt_simulator.visualizer import Visualizer
+
+
+def add_bot_per_pixel(visualizer, image, pose, radius, color_code):
+    road_width_pix = visualizer.road_width*visualizer.m2pix
+    radius_pix = int(radius*visualizer.m2pix)
+    center_u = visualizer.image_width/2 + road_width_pix/4
+    center_y = visualizer.image_height - visualizer.y_baseline
+    x, y, theta = pose
+    u_bot = int(x*visualizer.m2pix + center_u)
+    v_bot = int(center_y - y*visualizer.m2pix)
+    for u in range(u_bot-radius_pix, u_bot+radius_pix):
+        for v in range(v_bot-radius_pix, v_bot+radius_pix):
+            if ((u-u_bot)*(u-u_bot) + (v-v_bot)*(v-v_bot)) < radius_pix*radius_pix:
+                if v < visualizer.image_height and v >= 0 and u < visualizer.image_width and u >= 0:
+                    image[v, u] = color_code
+                    if abs((u-u_bot) - math.tan(theta)*(v_bot-v)) <= 1.5 and (v_bot-v)*math.cos(theta+0.01) >= 0:
+                        image[v, u] = (0, 0, 0)
+    return image
+
+
+def create_image_state_per_pixel(visualizer, our_duckie_pose, other_duckie_pose):
+    image = visualizer.create_base_image()
+    image = add_bot_per_pixel(visualizer, image, our_duckie_pose, visualizer.our_duckie_radius, (0, 0, 255))
+    image = add_bot_per_pixel(visualizer, image, other_duckie_pose, visualizer.other_duckie_radius, (0, 255, 255))
+    return image
+
+
+def random_poses(number_poses, rng):
+    # Poses over the image, some of them partly outside of it
+    return [(rng.uniform(-3, 3), rng.uniform(-2, 15), rng.uniform(-math.pi, math.pi)) for _ in range(number_poses)]
+
+
+if __name__ == '__main__':
+    number_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    image_params = load_config("sim.yaml")["sim"]["image"]
+    _, world_params, our_duckie_params, other_duckie_params, _ = load_simulation_params()
+    visualizer = Visualizer(image_params, world_params, our_duckie_params, other_duckie_params)
+    rng = np.random.RandomState(0)
+    our_poses, other_poses = random_poses(number_frames, rng), random_poses(number_frames, rng)
+
+    different = sum(not np.array_equal(visualizer.create_image_state(our_pose, other_pose), create_image_state_per_pixel(visualizer, our_pose, other_pose)) for our_pose, other_pose in zip(our_poses, other_poses))
+    print("%dx%d image, m2pix %d: %d of %d frames different from the per pixel drawing" % (visualizer.image_height, visualizer.image_width, visualizer.m2pix, different, number_frames))
+
+    start = time.time()
+    for our_pose, other_pose in zip(our_poses, other_poses):
+        create_image_state_per_pixel(visualizer, our_pose, other_pose)
+    per_pixel_time = (time.time() - start) / number_frames
+    start = time.time()
+    for our_pose, other_pose in zip(our_poses, other_poses):
+        visualizer.create_image_state(our_pose, other_pose)
+    masks_time = (time.time() - start) / number_frames
+    print("per pixel: %.1f FPS, cached road and masks: %.1f FPS (x%.0f)" % (1 / per_pixel_time, 1 / masks_time, per_pixel_time / masks_time))
@@ -2,9 +2,10 @@ import logging
 import rospy
 from dt_comm.enums import Ground, SafetyStatus
 from dt_agent.planner import RRT_Dubins
-from .predictor import PredictorDiscretePropagation
+from .predictor import PredictorDiscretePropagation, PredictorDensePropagation
 import numpy as np
 from mcts import mctsPlanner
+from .mcts_array import mctsArrayPlanner
 from pathplan_uncertainty.msg import Int32TimeStep, Pose2DTimeStep, WorldState, Observation, AgentCommand
 
 class Agent(object):
@@ -21,6 +22,10 @@ class Agent(object):
         self.vel_resolution = agent_params["vel_resolution"]
         self.comp_time_mean = agent_params["comp_time_mean"]
         self.comp_time_std_dev = agent_params["comp_time_std_dev"]
+        self.predictor_type = agent_params["predictor_type"]
+        self.planner_type = agent_params["planner_type"]
+        self.planner_deadline = agent_params["planner_deadline"]
+        self.planner_deadline_ms = agent_params["planner_deadline_ms"]
 
         self.dt = sim_params["dt"]
         self.road_width = sim_params["road_width"]
@@ -31,14 +36,24 @@ class Agent(object):
         self.our_duckie_velocity = our_duckie_params["velocity"]
         self.our_duckie_radius = our_duckie_params["radius"] 
         # Objects
-        self.predictor = PredictorDiscretePropagation(agent_params, sim_params)
+        if self.predictor_type == "discrete_propagation":
+            self.predictor = PredictorDiscretePropagation(agent_params, sim_params)
+        elif self.predictor_type == "dense_propagation":
+            self.predictor = PredictorDensePropagation(agent_params, sim_params)
+        else:
+            rospy.logerr("[Agent] Unknown predictor type. Look in pathplan_uncertainty/config/agent.yaml and make sure it is fine!")
 
 
         
 
         #init mcts planner class 
 
-        self.planner = mctsPlanner(self.predictor, agent_params, sim_params, our_duckie_params, reward_params)  ##needs to have access to predictor
+        if self.planner_type == "mcts":
+            self.planner = mctsPlanner(self.predictor, agent_params, sim_params, our_duckie_params, reward_params)  ##needs to have access to predictor
+        elif self.planner_type == "mcts_array":
+            self.planner = mctsArrayPlanner(self.predictor, agent_params, sim_params, our_duckie_params, reward_params)
+        else:
+            rospy.logerr("[Agent] Unknown planner type. Look in pathplan_uncertainty/config/agent.yaml and make sure it is fine!")
 
 
         #the dubins rrt method will compute rrt with an added constraint -> (min turning radius(so that unrealistic/jerky turns aren't used), 
@@ -62,7 +77,10 @@ class Agent(object):
         plan = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
         timesteps = self.draw_computation_time_steps()
         goal = [0, obs_msg.our_duckie_pose.y + 8]
-        path, angles, moves = self.planner.computePlan(goal, obs_msg)
+        path, angles, moves = self.planner.computePlan(goal, obs_msg, self.get_planning_time_budget(timesteps))
+        self.planner.advance_root(timesteps)     # The simulator executes the first timesteps moves before the next observation
+        stats = self.planner.search_stats
+        rospy.loginfo("[Agent] Search: %d iterations in %.1f ms (%.0f iterations/s), max depth %d, plan depth %d" % (stats["iterations"], 1000*stats["time"], stats["iterations_per_second"], stats["max_depth"], stats["plan_depth"]))
 
 
         print('angles')
@@ -76,6 +94,18 @@ class Agent(object):
 
         return plan, timesteps
 
+    def reset(self):
+        # Starts a new episode: nothing planned in the previous one is reused
+        self.planner.reset()
+
+    def get_planning_time_budget(self, computation_time_steps):
+        # Wall-clock time in seconds given to the planner, None to run a fixed number of iterations
+        if self.planner_deadline == "wall_clock":
+            return self.planner_deadline_ms/1000.0
+        elif self.planner_deadline == "computation_time":
+            return computation_time_steps*self.dt
+        return None
+
     def draw_computation_time_steps(self):
         number_steps = int(round(np.random.normal(self.comp_time_mean, self.comp_time_std_dev)))
         if number_steps < 1:
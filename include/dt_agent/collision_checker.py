@@ -0,0 +1,45 @@
+"""
+Time-indexed collision checkers: the probability that our duckie collides with the other duckie along a sampled path,
+each sample being compared only with the predicted obstacle at its arrival time.
+"""
+
+import numpy as np
+
+
+class RolloutCollisionChecker():
+
+    def __init__(self, rollouts, dt, radius):
+        """
+        rollouts: (samples, time_steps, 3) x, y, radius of the obstacle at times k*dt, each sample being an equally likely
+                  future (from MotionModel.rollout_batch, or the [x, y, radius] list of rollout_model as a single sample)
+        dt: time between two steps of the rollouts
+        radius: radius of our duckie
+        """
+        self.rollouts = np.asarray(rollouts, dtype=float).reshape((-1,) + np.shape(rollouts)[-2:])
+        self.dt = dt
+        self.radius = radius
+
+    def collision_probability(self, xs, ys, times):
+        # Fraction of the sampled futures in which one of the points (xs, ys) reached at times collides with the obstacle.
+        # Times beyond the rollouts use their last step.
+        k_t = np.clip(np.floor(np.asarray(times) / self.dt + 1e-6).astype(int), 0, self.rollouts.shape[1] - 1)
+        obstacles = self.rollouts[:, k_t]                                          # (samples, points, 3)
+        sq_distances = (obstacles[:, :, 0] - xs) ** 2 + (obstacles[:, :, 1] - ys) ** 2
+        collisions = sq_distances <= (obstacles[:, :, 2] + self.radius) ** 2
+        return collisions.any(axis=1).mean()
+
+
+class PredictorCollisionChecker():
+
+    def __init__(self, predictor):
+        """
+        predictor: PredictorDensePropagation after predict(), whose collision field is built for the radius of our duckie
+        """
+        self.predictor = predictor
+
+    def collision_probability(self, xs, ys, times):
+        # Largest probability of collision of the points (xs, ys) reached at times (from the time of the prediction), read
+        # from the collision field in one query. The events at different times are not independent (a single obstacle),
+        # the largest one is a lower bound of the probability of collision along the path.
+        probabilities = self.predictor.get_collision_probabilities(xs, ys, self.predictor.time + np.asarray(times))
+        return probabilities.max() if probabilities.size > 0 else 0.0
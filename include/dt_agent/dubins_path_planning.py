@@ -6,9 +6,14 @@ author Atsushi Sakai (@Atsushi_twi)
 
 """
 import math
+import numpy as np
 import matplotlib.pyplot as plt
 
 
+# Words of the Dubins paths, in the order in which they are evaluated
+WORDS = [["L", "S", "L"], ["R", "S", "R"], ["L", "S", "R"], ["R", "S", "L"], ["R", "L", "R"], ["L", "R", "L"]]
+
+
 def mod2pi(theta):
     return theta - 2.0 * math.pi * math.floor(theta / 2.0 / math.pi)
 
@@ -17,123 +22,93 @@ def pi_2_pi(angle):
     return (angle + math.pi) % (2 * math.pi) - math.pi
 
 
-def LSL(alpha, beta, d):
-    sa = math.sin(alpha)
-    sb = math.sin(beta)
-    ca = math.cos(alpha)
-    cb = math.cos(beta)
-    c_ab = math.cos(alpha - beta)
-
-    tmp0 = d + sa - sb
-
-    mode = ["L", "S", "L"]
-    p_squared = 2 + (d * d) - (2 * c_ab) + (2 * d * (sa - sb))
-    if p_squared < 0:
-        return None, None, None, mode
-    tmp1 = math.atan2((cb - ca), tmp0)
-    t = mod2pi(-alpha + tmp1)
-    p = math.sqrt(p_squared)
-    q = mod2pi(beta - tmp1)
-    #  print(np.rad2deg(t), p, np.rad2deg(q))
-
-    return t, p, q, mode
-
-
-def RSR(alpha, beta, d):
-    sa = math.sin(alpha)
-    sb = math.sin(beta)
-    ca = math.cos(alpha)
-    cb = math.cos(beta)
-    c_ab = math.cos(alpha - beta)
-
-    tmp0 = d - sa + sb
-    mode = ["R", "S", "R"]
-    p_squared = 2 + (d * d) - (2 * c_ab) + (2 * d * (sb - sa))
-    if p_squared < 0:
-        return None, None, None, mode
-    tmp1 = math.atan2((ca - cb), tmp0)
-    t = mod2pi(alpha - tmp1)
-    p = math.sqrt(p_squared)
-    q = mod2pi(-beta + tmp1)
+class ScalarMath(object):
+    """
+    The NumPy functions used by dubins_words, for floats
+    """
+    sin = staticmethod(math.sin)
+    cos = staticmethod(math.cos)
+    arctan2 = staticmethod(math.atan2)
+    arccos = staticmethod(math.acos)
+    sqrt = staticmethod(math.sqrt)
+    floor = staticmethod(math.floor)
+    maximum = staticmethod(max)
 
-    return t, p, q, mode
+    @staticmethod
+    def clip(value, lower, upper):
+        return min(max(value, lower), upper)
 
 
-def LSR(alpha, beta, d):
-    sa = math.sin(alpha)
-    sb = math.sin(beta)
-    ca = math.cos(alpha)
-    cb = math.cos(beta)
-    c_ab = math.cos(alpha - beta)
+def xp_mod2pi(theta, xp):
+    return theta - 2.0 * math.pi * xp.floor(theta / 2.0 / math.pi)
 
-    p_squared = -2 + (d * d) + (2 * c_ab) + (2 * d * (sa + sb))
-    mode = ["L", "S", "R"]
-    if p_squared < 0:
-        return None, None, None, mode
-    p = math.sqrt(p_squared)
-    tmp2 = math.atan2((-ca - cb), (d + sa + sb)) - math.atan2(-2.0, p)
-    t = mod2pi(-alpha + tmp2)
-    q = mod2pi(-mod2pi(beta) + tmp2)
 
-    return t, p, q, mode
+def np_mod2pi(theta):
+    return xp_mod2pi(theta, np)
 
 
-def RSL(alpha, beta, d):
-    sa = math.sin(alpha)
-    sb = math.sin(beta)
-    ca = math.cos(alpha)
-    cb = math.cos(beta)
-    c_ab = math.cos(alpha - beta)
+def dubins_words(alpha, beta, d, xp):
+    """
+    Segment lengths of the words of WORDS, in the same order (LSL, RSR, LSR, RSL, RLR, LRL), for floats (xp is ScalarMath)
+    or arrays (xp is np) of alpha, beta and d
 
-    p_squared = (d * d) - 2 + (2 * c_ab) - (2 * d * (sa + sb))
-    mode = ["R", "S", "L"]
-    if p_squared < 0:
-        return None, None, None, mode
-    p = math.sqrt(p_squared)
-    tmp2 = math.atan2((ca + cb), (d - sa - sb)) - math.atan2(2.0, p)
-    t = mod2pi(alpha - tmp2)
-    q = mod2pi(beta - tmp2)
+    output:
+        list of (valid, t, p, q) for each word, valid being False where the word has no path
+    """
+    sa = xp.sin(alpha)
+    sb = xp.sin(beta)
+    ca = xp.cos(alpha)
+    cb = xp.cos(beta)
+    c_ab = xp.cos(alpha - beta)
+    solutions = []
+
+    # LSL
+    p_squared = 2 + (d * d) - (2 * c_ab) + (2 * d * (sa - sb))
+    tmp1 = xp.arctan2((cb - ca), d + sa - sb)
+    solutions.append((p_squared >= 0, xp_mod2pi(-alpha + tmp1, xp), xp.sqrt(xp.maximum(p_squared, 0)), xp_mod2pi(beta - tmp1, xp)))
 
-    return t, p, q, mode
+    # RSR
+    p_squared = 2 + (d * d) - (2 * c_ab) + (2 * d * (sb - sa))
+    tmp1 = xp.arctan2((ca - cb), d - sa + sb)
+    solutions.append((p_squared >= 0, xp_mod2pi(alpha - tmp1, xp), xp.sqrt(xp.maximum(p_squared, 0)), xp_mod2pi(-beta + tmp1, xp)))
 
+    # LSR
+    p_squared = -2 + (d * d) + (2 * c_ab) + (2 * d * (sa + sb))
+    p = xp.sqrt(xp.maximum(p_squared, 0))
+    tmp2 = xp.arctan2((-ca - cb), (d + sa + sb)) - xp.arctan2(-2.0, p)
+    solutions.append((p_squared >= 0, xp_mod2pi(-alpha + tmp2, xp), p, xp_mod2pi(-xp_mod2pi(beta, xp) + tmp2, xp)))
 
-def RLR(alpha, beta, d):
-    sa = math.sin(alpha)
-    sb = math.sin(beta)
-    ca = math.cos(alpha)
-    cb = math.cos(beta)
-    c_ab = math.cos(alpha - beta)
+    # RSL
+    p_squared = (d * d) - 2 + (2 * c_ab) - (2 * d * (sa + sb))
+    p = xp.sqrt(xp.maximum(p_squared, 0))
+    tmp2 = xp.arctan2((ca + cb), (d - sa - sb)) - xp.arctan2(2.0, p)
+    solutions.append((p_squared >= 0, xp_mod2pi(alpha - tmp2, xp), p, xp_mod2pi(beta - tmp2, xp)))
 
-    mode = ["R", "L", "R"]
+    # RLR
     tmp_rlr = (6.0 - d * d + 2.0 * c_ab + 2.0 * d * (sa - sb)) / 8.0
-    if abs(tmp_rlr) > 1.0:
-        return None, None, None, mode
-
-    p = mod2pi(2 * math.pi - math.acos(tmp_rlr))
-    t = mod2pi(alpha - math.atan2(ca - cb, d - sa + sb) + mod2pi(p / 2.0))
-    q = mod2pi(alpha - beta - t + mod2pi(p))
-    return t, p, q, mode
+    p = xp_mod2pi(2 * math.pi - xp.arccos(xp.clip(tmp_rlr, -1.0, 1.0)), xp)
+    t = xp_mod2pi(alpha - xp.arctan2(ca - cb, d - sa + sb) + xp_mod2pi(p / 2.0, xp), xp)
+    solutions.append((abs(tmp_rlr) <= 1.0, t, p, xp_mod2pi(alpha - beta - t + xp_mod2pi(p, xp), xp)))
 
-
-def LRL(alpha, beta, d):
-    sa = math.sin(alpha)
-    sb = math.sin(beta)
-    ca = math.cos(alpha)
-    cb = math.cos(beta)
-    c_ab = math.cos(alpha - beta)
-
-    mode = ["L", "R", "L"]
+    # LRL
     tmp_lrl = (6. - d * d + 2 * c_ab + 2 * d * (- sa + sb)) / 8.
-    if abs(tmp_lrl) > 1:
-        return None, None, None, mode
-    p = mod2pi(2 * math.pi - math.acos(tmp_lrl))
-    t = mod2pi(-alpha - math.atan2(ca - cb, d + sa - sb) + p / 2.)
-    q = mod2pi(mod2pi(beta) - alpha - t + mod2pi(p))
+    p = xp_mod2pi(2 * math.pi - xp.arccos(xp.clip(tmp_lrl, -1.0, 1.0)), xp)
+    t = xp_mod2pi(-alpha - xp.arctan2(ca - cb, d + sa - sb) + p / 2., xp)
+    solutions.append((abs(tmp_lrl) <= 1.0, t, p, xp_mod2pi(xp_mod2pi(beta, xp) - alpha - t + xp_mod2pi(p, xp), xp)))
 
-    return t, p, q, mode
+    return solutions
 
 
-def dubins_path_planning_from_origin(ex, ey, eyaw, c):
+def dubins_path_parameters_from_origin(ex, ey, eyaw, c):
+    """
+    Shortest Dubins path from the origin to (ex, ey, eyaw), without generating its points
+
+    output:
+        [t, p, q] normalized lengths of the three segments
+        mode
+        cost (t + p + q)
+    """
+    # Same words as dubins_path_parameters_batch_from_origin, evaluated on floats, which is faster for one pose
     # nomalize
     dx = ex
     dy = ey
@@ -146,28 +121,109 @@ def dubins_path_planning_from_origin(ex, ey, eyaw, c):
     beta = mod2pi(eyaw - theta)
     #  print(theta, alpha, beta, d)
 
-    planners = [LSL, RSR, LSR, RSL, RLR, LRL]
-
     bcost = float("inf")
     bt, bp, bq, bmode = None, None, None, None
 
-    for planner in planners:
-        t, p, q, mode = planner(alpha, beta, d)
-        if t is None:
-            #  print("".join(mode) + " cannot generate path")
+    for mode, (valid, t, p, q) in zip(WORDS, dubins_words(alpha, beta, d, ScalarMath)):
+        if not valid:
             continue
 
         cost = (abs(t) + abs(p) + abs(q))
         if bcost > cost:
-            bt, bp, bq, bmode = t, p, q, mode
+            bt, bp, bq, bmode = t, p, q, list(mode)
             bcost = cost
 
+    return [bt, bp, bq], bmode, bcost
+
+
+def dubins_path_parameters_batch_from_origin(ex, ey, eyaw, c):
+    """
+    Shortest Dubins paths from the origin to 1d arrays of end poses: the words are evaluated for all the poses at once,
+    with the same equations as for one pose in dubins_path_parameters_from_origin
+
+    output:
+        words: index in WORDS of the best word of each pose, -1 if there is no path
+        lengths: (n, 3) normalized lengths of the three segments
+        costs: t + p + q, inf if there is no path
+    """
+    # nomalize
+    d = np.hypot(ex, ey) / c
+    theta = np_mod2pi(np.arctan2(ey, ex))
+    alpha = np_mod2pi(- theta)
+    beta = np_mod2pi(eyaw - theta)
+
+    solutions = dubins_words(alpha, beta, d, np)
+    valid = np.array([solution[0] for solution in solutions])
+    lengths = np.array([solution[1:] for solution in solutions])
+
+    costs = np.where(valid, np.abs(lengths).sum(axis=1), np.inf)
+    words = np.argmin(costs, axis=0)          # first best word, as in the scalar loop
+    index = np.arange(len(words))
+    best_costs = costs[words, index]
+    best_lengths = np.moveaxis(lengths, 1, -1)[words, index]
+    words = np.where(np.isinf(best_costs), -1, words)
+    return words, best_lengths, best_costs
+
+
+def dubins_path_parameters_batch(sx, sy, syaw, ex, ey, eyaw, c):
+    """
+    Batch version of dubins_path_parameters, for arrays (or scalars, broadcast) of start and end poses
+
+    output:
+        words: index in WORDS of the best word of each pair, -1 if there is no path
+        lengths: (n, 3) normalized lengths of the three segments
+        costs: t + p + q, inf if there is no path
+    """
+    sx, sy, syaw, ex, ey, eyaw = np.broadcast_arrays(*[np.atleast_1d(np.asarray(value, dtype=float)) for value in [sx, sy, syaw, ex, ey, eyaw]])
+    ex = ex - sx
+    ey = ey - sy
+
+    lex = np.cos(syaw) * ex + np.sin(syaw) * ey
+    ley = - np.sin(syaw) * ex + np.cos(syaw) * ey
+    leyaw = eyaw - syaw
+
+    return dubins_path_parameters_batch_from_origin(lex, ley, leyaw, c)
+
+
+def dubins_path_planning_from_origin(ex, ey, eyaw, c):
+    lengths, bmode, bcost = dubins_path_parameters_from_origin(ex, ey, eyaw, c)
+
     #  print(bmode)
-    px, py, pyaw = generate_course([bt, bp, bq], bmode, c)
+    px, py, pyaw = generate_course(lengths, bmode, c)
 
     return px, py, pyaw, bmode, bcost
 
 
+def dubins_path_parameters(sx, sy, syaw, ex, ey, eyaw, c):
+    """
+    Segment lengths, mode and cost of the shortest Dubins path from (sx, sy, syaw) to (ex, ey, eyaw),
+    the points of which can be generated later with dubins_path_points
+    """
+    ex = ex - sx
+    ey = ey - sy
+
+    lex = math.cos(syaw) * ex + math.sin(syaw) * ey
+    ley = - math.sin(syaw) * ex + math.cos(syaw) * ey
+    leyaw = eyaw - syaw
+
+    return dubins_path_parameters_from_origin(lex, ley, leyaw, c)
+
+
+def dubins_path_points(sx, sy, syaw, lengths, mode, c):
+    """
+    Points of the Dubins path starting at (sx, sy, syaw) given by its segment lengths and mode
+    """
+    lpx, lpy, lpyaw = generate_course(lengths, mode, c)
+
+    px = [math.cos(-syaw) * x + math.sin(-syaw) *
+          y + sx for x, y in zip(lpx, lpy)]
+    py = [- math.sin(-syaw) * x + math.cos(-syaw) *
+          y + sy for x, y in zip(lpx, lpy)]
+    pyaw = [pi_2_pi(iyaw + syaw) for iyaw in lpyaw]
+
+    return px, py, pyaw
+
+
 def dubins_path_planning(sx, sy, syaw, ex, ey, eyaw, c):
     """
     Dubins path plannner
@@ -189,21 +245,8 @@ def dubins_path_planning(sx, sy, syaw, ex, ey, eyaw, c):
 
     """
 
-    ex = ex - sx
-    ey = ey - sy
-
-    lex = math.cos(syaw) * ex + math.sin(syaw) * ey
-    ley = - math.sin(syaw) * ex + math.cos(syaw) * ey
-    leyaw = eyaw - syaw
-
-    lpx, lpy, lpyaw, mode, clen = dubins_path_planning_from_origin(
-        lex, ley, leyaw, c)
-
-    px = [math.cos(-syaw) * x + math.sin(-syaw) *
-          y + sx for x, y in zip(lpx, lpy)]
-    py = [- math.sin(-syaw) * x + math.cos(-syaw) *
-          y + sy for x, y in zip(lpx, lpy)]
-    pyaw = [pi_2_pi(iyaw + syaw) for iyaw in lpyaw]
+    lengths, mode, clen = dubins_path_parameters(sx, sy, syaw, ex, ey, eyaw, c)
+    px, py, pyaw = dubins_path_points(sx, sy, syaw, lengths, mode, c)
     #  print(syaw)
     #  pyaw = lpyaw
 
@@ -216,6 +259,50 @@ def dubins_path_planning(sx, sy, syaw, ex, ey, eyaw, c):
     return px, py, pyaw, mode, clen
 
 
+def dubins_path_sample(sx, sy, syaw, lengths, mode, c, step, offset=0.0, endpoint=True):
+    """
+    Points of the Dubins path starting at (sx, sy, syaw) given by its segment lengths and mode, every step of arc length,
+    computed with the closed form of the arcs and straight lines (same convention for c as generate_course)
+
+    input:
+        step arc length between two points [m], for example dt * velocity to get one point per time step
+        offset arc length of the first point [m]
+        endpoint if True, the end of the path is added after the last point
+
+    output:
+        px, py, pyaw arrays
+    """
+    segment_lengths = [l * c for l in lengths]
+    total = sum(segment_lengths)
+    s = np.arange(offset, total, step)
+    if endpoint:
+        s = np.append(s, total)
+
+    # Pose at the start of each segment and direction of the turn (1 left, -1 right, 0 straight)
+    starts = []
+    x, y, yaw = sx, sy, syaw
+    for m, l in zip(mode, segment_lengths):
+        sign = {"L": 1.0, "R": -1.0, "S": 0.0}[m]
+        starts.append((x, y, yaw, sign))
+        if sign == 0.0:
+            x, y = x + l * math.cos(yaw), y + l * math.sin(yaw)
+        else:
+            end_yaw = yaw + sign * l / c
+            x, y = x + sign * c * (math.sin(end_yaw) - math.sin(yaw)), y - sign * c * (math.cos(end_yaw) - math.cos(yaw))
+            yaw = end_yaw
+    starts = np.array(starts)
+
+    segment = np.minimum(np.searchsorted(np.cumsum(segment_lengths), s, side="right"), len(segment_lengths) - 1)
+    ds = s - np.concatenate(([0.0], np.cumsum(segment_lengths)[:-1]))[segment]
+    x0, y0, yaw0, sign = starts[segment].T
+
+    turning = sign != 0.0
+    pyaw = yaw0 + sign * ds / c
+    px = np.where(turning, x0 + sign * c * (np.sin(pyaw) - np.sin(yaw0)), x0 + ds * np.cos(yaw0))
+    py = np.where(turning, y0 - sign * c * (np.cos(pyaw) - np.cos(yaw0)), y0 + ds * np.sin(yaw0))
+    return px, py, (pyaw + math.pi) % (2 * math.pi) - math.pi
+
+
 def generate_course(length, mode, c):
 
     px = [0.0]
@@ -7,6 +7,7 @@ import argparse
 import numpy as np
 import matplotlib.pyplot as plt
 import random
+import time
 import scipy.stats as stats
 from dt_comm.enums import Ground
 
@@ -15,6 +16,9 @@ costMat = np.zeros((100,100,100))
 #MCTS scalar.  Larger scalar will increase exploitation, smaller will increase exploration. 
 SCALAR=1/math.sqrt(2.0)  			
 
+#With a deadline, the clock is only read every DEADLINE_CHECK_PERIOD iterations
+DEADLINE_CHECK_PERIOD = 8
+
 #gradually decrease exploitation
 
 #to make sure:
@@ -36,6 +40,9 @@ class mctsPlanner():
 		self.radius = our_duckie_params["radius"]
 		self.reward_params = reward_params
 		self.number_time_steps = int(self.time_horizon/self.dt)
+		self.budget = agent_params["planner_budget"]
+		self.max_turns = State().turn
+		self.search_stats = {}
 
         #self.number_y_steps = int(self.y_horizon/self.y_resolution)
         
@@ -48,7 +55,8 @@ class mctsPlanner():
         # self.other_duckie_max_acceleration = sim_params["other_duckie_max_acceleration"]
 
 
-	def computePlan(self, goal, obs_msg):
+	def computePlan(self, goal, obs_msg, time_budget=None):
+		# time_budget: if given, wall-clock time in seconds during which the search runs (instead of self.budget iterations)
 
 		self.goal = goal
 		levels = 1
@@ -58,13 +66,27 @@ class mctsPlanner():
 		current_node.cum_angle = obs_msg.our_duckie_pose.theta
 
 		for l in range(levels):
-			current_node=self.UCTSEARCH(100,current_node)
+			current_node=self.UCTSEARCH(self.budget,current_node,self.get_deadline(time_budget))
 			print("level %d"%l)
 			print("Num Children: %d"%len(current_node.children))
 			for i,c in enumerate(current_node.children):
 				print(i,c)
 			print("state: %s"%current_node.state)
-		return self.bestPath(current_node)
+		path, angles, moves = self.bestPath(current_node)
+		self.search_stats["plan_depth"] = len(moves)
+		return path, angles, moves
+
+	def close(self):
+		# No resource to release (see mctsArrayPlanner)
+		pass
+
+	def advance_root(self, number_moves):
+		# The tree is rebuilt at each plan, nothing to keep (see mctsArrayPlanner)
+		pass
+
+	def reset(self):
+		# Nothing is kept between plans (see mctsArrayPlanner)
+		pass
 
 	def bestPath(self, node):
 		path = []
@@ -78,17 +100,38 @@ class mctsPlanner():
 			node = self.BESTCHILD(node, 0)
 		return path, angles, moves
 
-	def UCTSEARCH(self, budget, root):
-		for iter in range(int(budget)):
+	def UCTSEARCH(self, budget, root, deadline=None):
+		start = time.time()
+		max_depth = 0
+		iter = 0
+		while not self.search_done(iter, budget, deadline):
 			if iter%10 == 9999:
 				rospy.loginfo("simulation: %d"%iter)
 				rospy.loginfo(root)
 			front = self.TREEPOLICY(root)
 			reward = self.GETREWARD(front.state) 
 			self.BACKUP(front,reward)
+			max_depth = max(max_depth, self.max_turns - front.state.turn)
+			iter += 1
+		self.record_search_stats(iter, start, max_depth)
 		return root	
 		# return self.BESTCHILD(root,0)
 
+	def get_deadline(self, time_budget):
+		if time_budget is None:
+			return None
+		return time.time() + time_budget
+
+	def search_done(self, iterations, budget, deadline):
+		# Without deadline, runs budget iterations. With a deadline, runs at least one iteration and as many as fit before it.
+		if deadline is None:
+			return iterations >= budget
+		return iterations > 0 and iterations % DEADLINE_CHECK_PERIOD == 0 and time.time() >= deadline
+
+	def record_search_stats(self, iterations, start, max_depth):
+		elapsed = time.time() - start
+		self.search_stats = {"iterations": iterations, "time": elapsed, "iterations_per_second": iterations/elapsed if elapsed > 0 else float("inf"), "max_depth": max_depth}
+
 	def TREEPOLICY(self, node):
 		#a hack to force 'exploitation' in a game where there are many options, and you may never/not want to fully expand first
 		while node.state.terminal() == False:
@@ -113,7 +156,7 @@ class mctsPlanner():
 		return node.children[-1]
 
 	def BESTCHILD(self, node, scalar):
-		bestscore = 0.0
+		bestscore = -float("inf")
 		bestchildren = []
 		for c in node.children:
 
@@ -132,15 +175,21 @@ class mctsPlanner():
 		return random.choice(bestchildren)
 
 	def get_collision_cost(self, state):
-		collsion_cost = self.predictor.get_collision_probability(state.x, state.y, self.number_time_steps - state.turn ,self.radius)
+		return self.get_collision_cost_at(state.x, state.y, state.turn)
+
+	def get_collision_cost_at(self, x, y, turn):
+		collsion_cost = self.predictor.get_collision_probability(x, y, self.number_time_steps - turn ,self.radius)
 		return collsion_cost
 
 	def GETREWARD(self,state):		
 		# while state.terminal() == False:
 		# 	state = self.next_state(state)
-		ground_type = self.check_ground(state)
+		return self.get_reward_at(state.x, state.y, state.turn)
+
+	def get_reward_at(self, x, y, turn):
+		ground_type = self.ground_type_at(x)
 		ground_reward = self.reward_params[ground_type]
-		reward = ground_reward + self.get_collision_cost(state)
+		reward = ground_reward + self.get_collision_cost_at(x, y, turn)
 		return reward 
 
 	def BACKUP(self, node,reward):
@@ -153,15 +202,21 @@ class mctsPlanner():
 	def next_state(self, state):
 		nextmove = random.choice(state.MOVES)	
 		nextstate = State(state.moves+[nextmove], state.turn-1) 
-		nextstate.cum_angle = state.cum_angle + nextmove
-
-		nextstate.x = state.y + ((self.v * self.dt) * math.sin(nextstate.cum_angle ))  
-		nextstate.y = state.x + ((self.v * self.dt) /(1.0 * math.cos(nextstate.cum_angle)))
+		nextstate.x, nextstate.y, nextstate.cum_angle = self.next_pose(state.x, state.y, state.cum_angle, nextmove)
 		return nextstate
 
+	def next_pose(self, x, y, cum_angle, move):
+		next_cum_angle = cum_angle + move
+
+		next_x = y + ((self.v * self.dt) * math.sin(next_cum_angle ))  
+		next_y = x + ((self.v * self.dt) /(1.0 * math.cos(next_cum_angle)))
+		return next_x, next_y, next_cum_angle
+
 	def check_ground(self, state):		
+	    return self.ground_type_at(state.x)
+
+	def ground_type_at(self, x):
 	    # Returns the type of ground for a duckie pose
-	    x = state.x
 	    if abs(x) <= 0.25*self.road_width:
 	        return Ground.RIGHT_LANE
 	    elif x < -0.25*self.road_width and x >= -0.75*self.road_width :
@@ -0,0 +1,527 @@
+#!/usr/bin/env python
+import math
+import random
+import time
+import multiprocessing
+from collections import OrderedDict
+import rospy
+import numpy as np
+from dt_comm.enums import Ground
+from .mcts import mctsPlanner, State, SCALAR
+from .predictor import PredictorDensePropagation
+
+# Reward removed from the path of a leaf while it waits in a rollout batch, so that the next leaves of the batch are chosen elsewhere
+VIRTUAL_LOSS = 1.0
+
+
+class ArrayTree():
+	# MCTS tree stored in preallocated arrays, nodes are integer ids.
+	# The children of a node are the number_moves consecutive ids starting at first_child[node], child first_child[node]+k
+	# being reached with the k-th move. A child id exists in the tree only once it has been expanded.
+
+	def __init__(self, number_moves, capacity=1024):
+		self.number_moves = number_moves
+		self.size = 0
+		self.allocate(capacity)
+
+	def allocate(self, capacity):
+		self.capacity = capacity
+		self.visits = np.zeros(capacity)
+		self.reward = np.zeros(capacity)
+		self.parent = np.full(capacity, -1, dtype=np.int32)
+		self.first_child = np.full(capacity, -1, dtype=np.int32)
+		self.move = np.full(capacity, -1, dtype=np.int32)
+		self.x = np.zeros(capacity)
+		self.y = np.zeros(capacity)
+		self.cum_angle = np.zeros(capacity)
+		self.depth = np.zeros(capacity, dtype=np.int32)
+		self.expanded = np.zeros(capacity, dtype=bool)
+		self.number_children = np.zeros(capacity, dtype=np.int32)
+		self.tt_slot = np.full(capacity, -1, dtype=np.int32)			# Transposition table slot and its generation when assigned
+		self.tt_generation = np.zeros(capacity, dtype=np.int32)
+
+	def grow(self, min_capacity):
+		# Geometric growth of all the arrays
+		capacity = self.capacity
+		while capacity < min_capacity:
+			capacity *= 2
+		for name in ["visits", "reward", "parent", "first_child", "move", "x", "y", "cum_angle", "depth", "expanded", "number_children", "tt_slot", "tt_generation"]:
+			old = getattr(self, name)
+			new = np.zeros(capacity, dtype=old.dtype)
+			if name in ["parent", "first_child", "move", "tt_slot"]:
+				new[:] = -1
+			new[:self.size] = old[:self.size]
+			setattr(self, name, new)
+		self.capacity = capacity
+
+	def reset(self, x, y, cum_angle):
+		# Clears the tree and creates the root (id 0)
+		self.size = 1
+		self.visits[:1] = 1
+		self.reward[:1] = 0
+		self.parent[:1] = -1
+		self.first_child[:1] = -1
+		self.move[:1] = -1
+		self.x[0], self.y[0], self.cum_angle[0] = x, y, cum_angle
+		self.depth[:1] = 0
+		self.expanded[:1] = True
+		self.number_children[:1] = 0
+		self.tt_slot[:1] = -1
+		return 0
+
+	def add_child(self, node, move_index, x, y, cum_angle):
+		if self.first_child[node] < 0:
+			if self.size + self.number_moves > self.capacity:
+				self.grow(self.size + self.number_moves)
+			first_child = self.size
+			self.size += self.number_moves
+			self.first_child[node] = first_child
+			self.parent[first_child:self.size] = node
+			self.move[first_child:self.size] = np.arange(self.number_moves)
+			self.depth[first_child:self.size] = self.depth[node] + 1
+			self.visits[first_child:self.size] = 1		# Not expanded yet: UCT score of -inf, so that the scores can be computed on the whole block
+			self.reward[first_child:self.size] = -np.inf
+			self.expanded[first_child:self.size] = False
+			self.first_child[first_child:self.size] = -1
+			self.number_children[first_child:self.size] = 0
+			self.tt_slot[first_child:self.size] = -1
+		child = self.first_child[node] + move_index
+		self.visits[child] = 1
+		self.reward[child] = 0
+		self.x[child], self.y[child], self.cum_angle[child] = x, y, cum_angle
+		self.expanded[child] = True
+		self.number_children[node] += 1
+		return child
+
+	def keep_subtree(self, node):
+		# Keeps only the subtree under node, which becomes the root (id 0), by copying it block by block in breadth-first order
+		# (the depth of the nodes is therefore non decreasing with their new ids)
+		old = dict((name, getattr(self, name)) for name in ["visits", "reward", "first_child", "move", "x", "y", "cum_angle", "expanded", "number_children"])
+		self.allocate(self.capacity)
+		self.reset(old["x"][node], old["y"][node], old["cum_angle"][node])
+		self.visits[0] = old["visits"][node]
+		self.reward[0] = old["reward"][node]
+		self.number_children[0] = old["number_children"][node]
+
+		queue = [(node, 0)]
+		k = 0
+		while k < len(queue):
+			old_node, new_node = queue[k]
+			k += 1
+			old_first_child = old["first_child"][old_node]
+			if old_first_child < 0:
+				continue
+			old_block = slice(old_first_child, old_first_child + self.number_moves)
+			new_first_child = self.size
+			new_block = slice(new_first_child, new_first_child + self.number_moves)
+			self.size += self.number_moves
+			for name in ["visits", "reward", "move", "x", "y", "cum_angle", "expanded", "number_children"]:
+				getattr(self, name)[new_block] = old[name][old_block]
+			self.first_child[new_node] = new_first_child
+			self.first_child[new_block] = -1
+			self.parent[new_block] = new_node
+			self.depth[new_block] = self.depth[new_node] + 1
+			for move_index in np.flatnonzero(old["expanded"][old_block]):
+				queue.append((old_first_child + move_index, new_first_child + move_index))
+		return 0
+
+	def path_to_root(self, node):
+		# Ids from node up to the root
+		parent = self.parent
+		path = []
+		while node >= 0:
+			path.append(node)
+			node = parent[node]
+		return path
+
+	def moves(self, node, move_values):
+		# Sequence of moves from the root to node, recovered by walking the parents
+		return [move_values[self.move[k]] for k in reversed(self.path_to_root(node)[:-1])]
+
+
+class TranspositionTable():
+	# Statistics shared by the nodes reaching the same quantized (x, y, cum_angle, depth), with a bounded number of entries.
+	# When full, the least recently used entry is evicted and its slot reused: the generation of the slot is then incremented,
+	# so that the nodes still pointing to it fall back to their own statistics.
+
+	def __init__(self, capacity, xy_resolution, angle_resolution):
+		self.capacity = capacity
+		self.xy_resolution = xy_resolution
+		self.angle_resolution = angle_resolution
+		self.visits = np.zeros(capacity)
+		self.reward = np.zeros(capacity)
+		self.generation = np.zeros(capacity, dtype=np.int32)
+		self.keys = [None]*capacity
+		self.slots = OrderedDict()			# key -> slot, from least to most recently used
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	def clear(self):
+		self.slots = OrderedDict()
+		self.generation += 1
+
+	def key(self, x, y, cum_angle, depth):
+		return (int(round(x/self.xy_resolution)), int(round(y/self.xy_resolution)), int(round(cum_angle/self.angle_resolution)), depth)
+
+	def lookup(self, key):
+		# Returns the slot and generation of key, creating the entry (with the statistics of a new node) if needed
+		slot = self.slots.pop(key, None)
+		if slot is not None:
+			self.hits += 1
+		else:
+			self.misses += 1
+			if len(self.slots) < self.capacity:
+				slot = len(self.slots)
+			else:
+				_, slot = self.slots.popitem(last=False)
+				self.evictions += 1
+			self.generation[slot] += 1
+			self.visits[slot] = 1
+			self.reward[slot] = 0
+			self.keys[slot] = key
+		self.slots[key] = slot
+		return slot, self.generation[slot]
+
+	def update(self, slot, reward, number_visits=1):
+		self.visits[slot] += number_visits
+		self.reward[slot] += reward
+		key = self.keys[slot]
+		self.slots[key] = self.slots.pop(key)			# Most recently used
+
+	def get_stats(self):
+		lookups = self.hits + self.misses
+		return {"size": len(self.slots), "hits": self.hits, "misses": self.misses, "evictions": self.evictions, "hit_rate": float(self.hits)/lookups if lookups > 0 else 0.0}
+
+
+class mctsArrayPlanner(mctsPlanner):
+	# Same search as mctsPlanner, on an ArrayTree instead of Node/State objects
+
+	def __init__(self, predictor, agent_params, sim_params, our_duckie_params, reward_params):
+		mctsPlanner.__init__(self, predictor, agent_params, sim_params, our_duckie_params, reward_params)
+		root_state = State()
+		self.move_values = root_state.MOVES
+		self.max_depth = root_state.turn
+		self.tree = ArrayTree(len(self.move_values))
+
+		# Subtree reuse: the next search starts from the node of the previous best path reached after the moves executed meanwhile
+		self.reuse_subtree = agent_params["planner_reuse_subtree"]
+		self.best_path_nodes = []
+		self.next_root = -1
+		self.reuse_stats = {"reused_trees": 0, "new_trees": 0, "carried_visits": 0}
+
+		# Batched random rollouts (disabled if the batch size is 0: the reward of a leaf is then the reward of its own pose)
+		self.rollout_batch_size = agent_params["planner_rollout_batch_size"]
+		self.ground_types = [Ground.RIGHT_LANE, Ground.WRONG_LANE, Ground.PARTIALLY_OUT_OF_ROAD, Ground.LOST]
+
+		# Transposition table (disabled if its size is 0)
+		self.transpositions = None
+		if agent_params["planner_transposition_table_size"] > 0:
+			self.transpositions = TranspositionTable(agent_params["planner_transposition_table_size"], agent_params["planner_transposition_xy_resolution"], agent_params["planner_transposition_angle_resolution"])
+
+		# Root parallelization: independent searches in a process pool, sharing the collision field of the predictor
+		self.workers = agent_params["planner_workers"]
+		self.worker_budget = agent_params["planner_worker_budget"]
+		if self.workers > 1 and not isinstance(predictor, PredictorDensePropagation):
+			rospy.logerr("[Agent][mctsArrayPlanner] Root parallelization needs the dense_propagation predictor, running a single search.")
+			self.workers = 1
+		self.worker_params = (agent_params, sim_params, our_duckie_params, reward_params)
+		self.pool = None
+		self.shared_field = None
+
+	def computePlan(self, goal, obs_msg, time_budget=None):
+		self.goal = goal
+		pose = (obs_msg.our_duckie_pose.x, obs_msg.our_duckie_pose.y, obs_msg.our_duckie_pose.theta)
+		if self.workers > 1:
+			return self.computePlanParallel(goal, pose, time_budget)
+		if self.transpositions is not None:
+			self.transpositions.clear()				# Keys depend on the root pose and depth
+		if self.reuse_subtree and self.next_root >= 0:
+			root = self.tree.keep_subtree(self.next_root)
+			self.reanchor(*pose)
+			carried_visits = int(self.tree.visits[root])
+			self.reuse_stats["reused_trees"] += 1
+			self.reuse_stats["carried_visits"] += carried_visits
+		else:
+			root = self.tree.reset(*pose)
+			carried_visits = 0
+			self.reuse_stats["new_trees"] += 1
+		self.next_root = -1
+
+		self.UCTSEARCH(self.budget, root, self.get_deadline(time_budget))
+		path, angles, moves = self.bestPath(root)
+		self.search_stats["plan_depth"] = len(moves)
+		self.search_stats["carried_visits"] = carried_visits
+		if self.transpositions is not None:
+			self.search_stats["transpositions"] = self.transpositions.get_stats()
+		return path, angles, moves
+
+	def computePlanParallel(self, goal, pose, time_budget):
+		# Runs self.workers independent searches from the same root, merges the statistics of the root children and
+		# returns the best path of the best root child, taken from the worker that visited it the most
+		start = time.time()
+		self.start_pool()
+		self.shared_field_view[...] = self.predictor.collision_field
+		field_state = self.predictor.get_collision_field_state()
+		tasks = [(goal, pose, field_state, time_budget, self.worker_budget, random.getrandbits(32)) for _ in range(self.workers)]
+		results = self.pool.map(search_worker, tasks)
+
+		visits = np.array([result["visits"] for result in results])
+		rewards = np.array([result["reward"] for result in results])
+		merged_visits = visits.sum(axis=0)
+		scores = np.full(len(self.move_values), -np.inf)
+		np.divide(rewards.sum(axis=0), merged_visits, out=scores, where=merged_visits > 0)
+		best_move = scores.argmax()
+		if scores[best_move] == -np.inf:
+			path, angles, moves = [[pose[0], pose[1]]], [pose[2]], []
+		else:
+			path, angles, moves = results[visits[:, best_move].argmax()]["paths"][best_move]
+
+		elapsed = time.time() - start
+		iterations = sum(result["iterations"] for result in results)
+		self.search_stats = {"iterations": iterations, "time": elapsed, "iterations_per_second": iterations/elapsed if elapsed > 0 else float("inf"), "max_depth": max(result["max_depth"] for result in results), "plan_depth": len(moves), "carried_visits": 0, "worker_root_visits": visits.tolist()}
+		self.best_path_nodes = []			# No subtree reuse across workers
+		self.reuse_stats["new_trees"] += 1
+		return path, angles, moves
+
+	def start_pool(self):
+		# The pool is (re)started when the collision field changes size, the field being shared with the workers through shared memory
+		field_size = self.predictor.collision_field.size
+		if self.pool is not None and len(self.shared_field) == field_size:
+			return
+		self.close()
+		self.shared_field = multiprocessing.RawArray('d', field_size)
+		self.shared_field_view = np.ctypeslib.as_array(self.shared_field).reshape(self.predictor.collision_field.shape)
+		self.pool = multiprocessing.Pool(self.workers, init_search_worker, self.worker_params + (self.shared_field, self.predictor.collision_field.shape))
+
+	def close(self):
+		if self.pool is not None:
+			self.pool.terminate()
+			self.pool = None
+
+	def get_root_summary(self, root):
+		# Statistics of the root children, with the best path through each of them
+		tree = self.tree
+		summary = {"visits": np.zeros(tree.number_moves), "reward": np.zeros(tree.number_moves), "paths": [None]*tree.number_moves, "iterations": self.search_stats["iterations"], "max_depth": self.search_stats["max_depth"]}
+		first_child = tree.first_child[root]
+		if first_child < 0:
+			return summary
+		for move_index in range(tree.number_moves):
+			child = first_child + move_index
+			if tree.expanded[child]:
+				if self.transpositions is None:
+					summary["visits"][move_index], summary["reward"][move_index] = tree.visits[child], tree.reward[child]
+				else:
+					summary["visits"][move_index], summary["reward"][move_index] = self.get_stats(child)
+				path, angles, moves = self.bestPath(child)
+				summary["paths"][move_index] = ([[tree.x[root], tree.y[root]]] + path, [tree.cum_angle[root]] + angles, moves)
+		return summary
+
+	def reset(self):
+		# Drops the subtree kept for the next search, which then starts from an empty tree (at the start of a new episode)
+		self.next_root = -1
+		self.best_path_nodes = []
+
+	def advance_root(self, number_moves):
+		# The first number_moves moves of the last plan will be executed before the next search
+		if number_moves < len(self.best_path_nodes):
+			self.next_root = self.best_path_nodes[number_moves]
+		else:
+			self.next_root = -1
+
+	def reanchor(self, x, y, cum_angle):
+		# Moves the root to the observed pose and recomputes the poses of the whole tree from it, one depth level at a time
+		tree = self.tree
+		tree.x[0], tree.y[0], tree.cum_angle[0] = x, y, cum_angle
+		depth = tree.depth[:tree.size]
+		level_starts = np.searchsorted(depth, np.arange(depth[-1] + 2))
+		for level in range(1, depth[-1] + 1):
+			ids = np.arange(level_starts[level], level_starts[level + 1])
+			parents = tree.parent[ids]
+			tree.x[ids], tree.y[ids], tree.cum_angle[ids] = self.next_poses(tree.x[parents], tree.y[parents], tree.cum_angle[parents], np.asarray(self.move_values)[tree.move[ids]])
+
+	def next_poses(self, x, y, cum_angle, moves):
+		# Vectorized mctsPlanner.next_pose
+		next_cum_angle = cum_angle + moves
+		next_x = y + ((self.v * self.dt) * np.sin(next_cum_angle))
+		next_y = x + ((self.v * self.dt) / (1.0 * np.cos(next_cum_angle)))
+		return next_x, next_y, next_cum_angle
+
+	def bestPath(self, node):
+		path = []
+		angles = []
+		moves = []
+		self.best_path_nodes = []
+		while node >= 0:
+			self.best_path_nodes.append(node)
+			path.append([self.tree.x[node], self.tree.y[node]])
+			angles.append(self.tree.cum_angle[node])
+			moves = self.tree.moves(node, self.move_values)
+			node = self.BESTCHILD(node, 0)
+		return path, angles, moves
+
+	def UCTSEARCH(self, budget, root, deadline=None):
+		start = time.time()
+		max_depth = 0
+		iter = 0
+		while not self.search_done(iter, budget, deadline):
+			if self.rollout_batch_size > 0:
+				# Collects a batch of leaves under virtual loss, rolls them out together, then backs up the actual rewards
+				leaves = []
+				while len(leaves) < self.rollout_batch_size and (len(leaves) == 0 or not self.search_done(iter, budget, deadline)):
+					front = self.TREEPOLICY(root)
+					self.BACKUP(front, -VIRTUAL_LOSS)
+					leaves.append(front)
+					max_depth = max(max_depth, int(self.tree.depth[front]))
+					iter += 1
+				for front, reward in zip(leaves, self.ROLLOUTS(np.array(leaves)).tolist()):
+					self.BACKUP(front, reward + VIRTUAL_LOSS, 0)
+				continue
+			front = self.TREEPOLICY(root)
+			reward = self.GETREWARD(front)
+			self.BACKUP(front, reward)
+			max_depth = max(max_depth, int(self.tree.depth[front]))
+			iter += 1
+		self.record_search_stats(iter, start, max_depth)
+		return root
+
+	def TREEPOLICY(self, node):
+		tree = self.tree
+		while tree.depth[node] < self.max_depth:
+			if tree.number_children[node] == 0:
+				return self.EXPAND(node)
+			elif random.random()<.5 or tree.number_children[node] == tree.number_moves:
+				child = self.BESTCHILD(node, SCALAR)
+				if child < 0:
+					return node
+				node = child
+			else:
+				return self.EXPAND(node)
+		return node
+
+	def EXPAND(self, node):
+		tree = self.tree
+		first_child = tree.first_child[node]
+		if first_child < 0:
+			move_index = random.randrange(tree.number_moves)
+		else:
+			move_index = random.choice((~tree.expanded[first_child:first_child + tree.number_moves]).nonzero()[0])
+		x, y, cum_angle = self.next_pose(float(tree.x[node]), float(tree.y[node]), float(tree.cum_angle[node]), self.move_values[move_index])
+		child = tree.add_child(node, move_index, x, y, cum_angle)
+		if self.transpositions is not None:
+			tree.tt_slot[child], tree.tt_generation[child] = self.transpositions.lookup(self.transpositions.key(x, y, cum_angle, int(tree.depth[child])))
+		return child
+
+	def BESTCHILD(self, node, scalar):
+		# UCT over the expanded children of node, -1 if it has no child
+		# The children being a contiguous block of only len(MOVES) ids, they are read at once and scored in a plain loop,
+		# which is faster than NumPy calls on such small arrays. Not expanded children have a reward of -inf.
+		tree = self.tree
+		first_child = tree.first_child[node]
+		if first_child < 0:
+			return -1
+		last_child = first_child + tree.number_moves
+		if self.transpositions is None:
+			log_visits = math.log(tree.visits[node])
+			children_stats = zip(tree.visits[first_child:last_child].tolist(), tree.reward[first_child:last_child].tolist())
+		else:
+			log_visits = math.log(self.get_stats(node)[0])
+			children_stats = [self.get_stats(child) for child in range(first_child, last_child)]
+		bestscore = -float("inf")
+		bestchildren = []
+		for k, (visits, reward) in enumerate(children_stats):
+			score = reward/visits + scalar*math.sqrt(2.0*log_visits/visits)		# -inf if not expanded
+			if score > bestscore:
+				bestchildren = [first_child + k]
+				bestscore = score
+			elif score == bestscore and len(bestchildren) > 0:
+				bestchildren.append(first_child + k)
+		if len(bestchildren) == 0:
+			return -1
+		return random.choice(bestchildren)
+
+	def get_stats(self, node):
+		# Visits and reward of node, shared through the transposition table if its entry is still valid
+		tree = self.tree
+		slot = tree.tt_slot[node]
+		if slot >= 0 and self.transpositions.generation[slot] == tree.tt_generation[node]:
+			return self.transpositions.visits[slot], self.transpositions.reward[slot]
+		return tree.visits[node], tree.reward[node]
+
+	def GETREWARD(self, node):
+		tree = self.tree
+		return self.get_reward_at(float(tree.x[node]), float(tree.y[node]), self.max_depth - int(tree.depth[node]))
+
+	def ROLLOUTS(self, leaves):
+		# Random rollouts from all leaves to the terminal depth, advanced together with one array of moves per step.
+		# The reward of a leaf is the mean of get_reward_at over its pose and the poses of its rollout, evaluated in one pass.
+		tree = self.tree
+		x, y, cum_angle = tree.x[leaves], tree.y[leaves], tree.cum_angle[leaves]
+		turns_left = self.max_depth - tree.depth[leaves]
+		number_steps = int(turns_left.max())
+		moves = np.asarray(self.move_values)[np.random.randint(len(self.move_values), size=(number_steps, len(leaves)))]
+
+		xs = np.empty((number_steps + 1, len(leaves)))
+		ys = np.empty((number_steps + 1, len(leaves)))
+		xs[0], ys[0] = x, y
+		for k in range(number_steps):
+			x, y, cum_angle = self.next_poses(x, y, cum_angle, moves[k])
+			xs[k + 1], ys[k + 1] = x, y
+		turns = turns_left - np.arange(number_steps + 1)[:, None]
+		valid = turns >= 0
+
+		rewards = self.get_ground_rewards_at(xs) + self.get_collision_costs_at(xs, ys, turns)
+		return np.where(valid, rewards, 0).sum(axis=0)/valid.sum(axis=0)
+
+	def get_ground_rewards_at(self, x):
+		# Vectorized reward_params[ground_type_at(x)]
+		right_lane = np.abs(x) <= 0.25*self.road_width
+		wrong_lane = (x < -0.25*self.road_width) & (x >= -0.75*self.road_width)
+		partially_out = ((x > -0.75*self.road_width - self.radius) & (x < -0.75*self.road_width)) | ((x > 0.25*self.road_width) & (x < 0.25*self.road_width + self.radius))
+		values = [self.reward_params[ground_type] for ground_type in self.ground_types]
+		return np.select([right_lane, wrong_lane, partially_out], values[:3], values[3])
+
+	def get_collision_costs_at(self, x, y, turns):
+		# Vectorized get_collision_cost_at, in one query of the collision field with the dense predictor
+		if isinstance(self.predictor, PredictorDensePropagation):
+			return self.predictor.get_collision_probabilities(x, y, self.number_time_steps - turns)
+		costs = [self.get_collision_cost_at(x_k, y_k, turn) for x_k, y_k, turn in zip(x.ravel().tolist(), y.ravel().tolist(), turns.ravel().tolist())]
+		return np.reshape(costs, x.shape)
+
+	def BACKUP(self, node, reward, number_visits=1):
+		visits = self.tree.visits
+		rewards = self.tree.reward
+		parent = self.tree.parent
+		transpositions = self.transpositions
+		while node >= 0:
+			visits[node] += number_visits
+			rewards[node] += reward
+			if transpositions is not None:
+				slot = self.tree.tt_slot[node]
+				if slot >= 0 and transpositions.generation[slot] == self.tree.tt_generation[node]:
+					transpositions.update(slot, reward, number_visits)
+			node = parent[node]
+
+
+# Root parallelization workers: each process has its own planner, whose predictor reads the collision field in shared memory
+
+worker_planner = None
+worker_field = None
+
+def init_search_worker(agent_params, sim_params, our_duckie_params, reward_params, shared_field, field_shape):
+	global worker_planner, worker_field
+	worker_params = dict(agent_params, planner_workers=1, planner_reuse_subtree=False)
+	worker_planner = mctsArrayPlanner(PredictorDensePropagation(worker_params, sim_params), worker_params, sim_params, our_duckie_params, reward_params)
+	worker_field = np.ctypeslib.as_array(shared_field).reshape(field_shape)
+
+def search_worker(task):
+	goal, pose, field_state, time_budget, budget, seed = task
+	random.seed(seed)
+	np.random.seed(seed)
+	worker_planner.predictor.set_collision_field_state(field_state, worker_field)
+	worker_planner.goal = goal
+	if worker_planner.transpositions is not None:
+		worker_planner.transpositions.clear()		# Keys depend on the root pose and depth
+	root = worker_planner.tree.reset(*pose)
+	worker_planner.UCTSEARCH(budget, root, worker_planner.get_deadline(time_budget))
+	return worker_planner.get_root_summary(root)
@@ -6,9 +6,18 @@ class MotionModel(object):
     def __init__(self, dt):
         self.dt = dt
 
-    def rollout_model(self):
+    def rollout_model(self, start_pos, radius, time_steps):
+        # Single rollout from a pose with x and y attributes, as a list of [x, y, radius] per time step
+        return self.rollout_batch(np.array([start_pos.x, start_pos.y]), radius, time_steps)[0].tolist()
+
+    def rollout_batch(self, start_positions, radius, time_steps):
+        # Rollouts of many start positions ((n, 2) array of x, y) and parameter sets at once,
+        # as a (samples, time_steps, 3) array of x, y, radius
         raise NotImplementedError
 
+    def stack_rollouts(self, x, y, radius):
+        return np.stack([x, y, np.broadcast_to(radius, x.shape)], axis=-1)
+
 class driving_towards_us(MotionModel):
 
     def __init__(self, dt, velx, vely):
@@ -17,11 +26,14 @@ class driving_towards_us(MotionModel):
         self.velx = velx
         #self.y_offset = y_offset
 
-    def rollout_model(self, start_pos, radius,  time_steps):
-        positions = []
-        for t in range(time_steps):
-            positions.append([start_pos.x + (self.velx * t * self.dt), start_pos.y + (self.vely * t * self.dt), radius])
-        return positions
+    def rollout_batch(self, start_positions, radius, time_steps, velx=None, vely=None):
+        # velx, vely: velocities of each sample (arrays broadcast with the start positions), the model's ones by default
+        start_positions = np.atleast_2d(start_positions)
+        velx = self.velx if velx is None else velx
+        vely = self.vely if vely is None else vely
+        x0, y0, velx, vely = np.broadcast_arrays(start_positions[:, 0], start_positions[:, 1], velx, vely)
+        t = np.arange(time_steps) * self.dt
+        return self.stack_rollouts(x0[:, None] + velx[:, None] * t, y0[:, None] + vely[:, None] * t, radius)
 
 
 
@@ -33,13 +45,16 @@ class zigzag_towards_us(MotionModel):
         self.velx = velx
         #self.y_offset = y_offset
 
-    def rollout_model(self, start_pos, radius, time_steps):
-        positions = []
-        for t in range(time_steps):
-            if( t % 3 ==0):
-                velx = -velx
-            positions.append([start_pos.x + (self.velx * t * self.dt), start_pos.y + (self.vely * t * self.dt), radius])
-        return positions
+    def rollout_batch(self, start_positions, radius, time_steps, velx=None, vely=None):
+        # The lateral velocity changes sign every 3 time steps (starting with -velx)
+        start_positions = np.atleast_2d(start_positions)
+        velx = self.velx if velx is None else velx
+        vely = self.vely if vely is None else vely
+        x0, y0, velx, vely = np.broadcast_arrays(start_positions[:, 0], start_positions[:, 1], velx, vely)
+        t = np.arange(time_steps)
+        signs = np.where((t // 3) % 2 == 0, -1.0, 1.0)
+        lateral = np.concatenate(([0.0], np.cumsum(signs)[:-1])) * self.dt          # sum of the signs before each time step
+        return self.stack_rollouts(x0[:, None] + velx[:, None] * lateral, y0[:, None] + vely[:, None] * t * self.dt, radius)
 
 
 class gaussian_in_place(MotionModel):
@@ -49,8 +64,12 @@ class gaussian_in_place(MotionModel):
         self.mean = mean
         self.std_dev = std_dev
 
-    def rollout_model(self, start_pos, radius, time_steps):                            ## implement
-        positions = []
-        for t in range(time_steps):
-            positions.append([])
-        return positions
+    def rollout_batch(self, start_positions, radius, time_steps, number_samples=1, mean=None, std_dev=None, rng=np.random):
+        # Gaussian random walk: at each time step, x and y move by independent N(mean, std_dev) steps (in m).
+        # Each start position gets number_samples futures, mean and std_dev can be given per sample.
+        start_positions = np.repeat(np.atleast_2d(start_positions), number_samples, axis=0)
+        mean = np.broadcast_to(self.mean if mean is None else mean, len(start_positions))
+        std_dev = np.broadcast_to(self.std_dev if std_dev is None else std_dev, len(start_positions))
+        steps = mean[:, None, None] + std_dev[:, None, None] * rng.standard_normal((len(start_positions), max(time_steps - 1, 0), 2))
+        positions = start_positions[:, None, :] + np.concatenate((np.zeros((len(start_positions), 1, 2)), np.cumsum(steps, axis=1)), axis=1)
+        return self.stack_rollouts(positions[:, :time_steps, 0], positions[:, :time_steps, 1], radius)
@@ -186,3 +186,244 @@ class PredictorDiscretePropagation(object):
         return probability
 
 
+
+
+class PredictorDensePropagation(PredictorDiscretePropagation):
+    def __init__(self, agent_params, sim_params):
+        PredictorDiscretePropagation.__init__(self, agent_params, sim_params)
+
+        #####
+        # Belief Structure:
+        # belief is a dense float array of shape (number_time_steps, number_y_steps, number_vel_bins)
+        # belief[k_t, k_y, k_v] is the probability for the other duckie to be, at time self.time + k_t*dt,
+        # at y = k_y*y_resolution with a velocity given by self.vel_bins[k_v].
+        #####
+
+        # Velocity discretization: the velocities reached from the min and max velocities by steps of vel_resolution. As velocities
+        # going out of the limits are clamped to them, like in PredictorDiscretePropagation, every velocity change keeps a velocity
+        # of this set in it, so that the propagation from one of them is the same as the one of PredictorDiscretePropagation.
+        # An observed velocity in between two of them is split over both, in proportion to its distance to each (keeping its
+        # mean): the prediction then differs a bit from the one of PredictorDiscretePropagation, which follows the exact velocity.
+        number_steps = int(math.floor((self.other_duckie_max_velocity - self.other_duckie_min_velocity)/self.vel_resolution + 1e-9))
+        from_limits = np.concatenate((self.other_duckie_min_velocity + self.vel_resolution*np.arange(number_steps + 1), self.other_duckie_max_velocity - self.vel_resolution*np.arange(number_steps + 1)))
+        self.vel_bins = np.unique(np.round(from_limits, 9))
+        self.number_vel_bins = len(self.vel_bins)
+
+        # Velocity transition matrix built from vel_changes: vel_transition[k_v, k_v_next] is the probability to go from one velocity bin to the other
+        self.vel_transition = np.zeros((self.number_vel_bins, self.number_vel_bins))
+        for vel_change in self.vel_changes:
+            next_vels = np.clip(self.vel_bins + vel_change, self.other_duckie_min_velocity, self.other_duckie_max_velocity)
+            next_bins = np.abs(next_vels[:, np.newaxis] - self.vel_bins[np.newaxis, :]).argmin(axis=1)
+            self.vel_transition[np.arange(self.number_vel_bins), next_bins] += self.prob_of_each_vel_change
+
+        self.y_shifts = np.zeros(self.number_vel_bins, dtype=int)
+        self.belief = np.zeros((self.number_time_steps, self.number_y_steps, self.number_vel_bins))
+        self.y_marginal = np.zeros((self.number_time_steps, self.number_y_steps))
+        self.y_values = self.y_resolution*np.arange(self.number_y_steps)
+
+        # Warm start: beliefs propagated from the edge of the y range, for each velocity bin, reused by shifting them along y
+        self.warm_start = agent_params["warm_start"]
+        self.reference_beliefs = {}
+        self.reference_theta = None
+        self.warm_start_count = 0
+        self.full_prediction_count = 0
+
+        #####
+        # Collision Field Structure:
+        # collision_field is a float array of shape (number_time_steps, number_field_x_steps, number_field_y_steps), built at each prediction
+        # collision_field[k_t, k_x, k_y] is the probability of collision at time self.time + k_t*dt if our duckie (of radius field_our_radius)
+        # is at x = field_x_min + k_x*y_resolution, y = field_y_min + k_y*y_resolution. Outside of the field, the probability of collision is 0.
+        #####
+        self.collision_field = np.zeros((self.number_time_steps, 0, 0))
+        self.field_our_radius = None
+        self.field_x_min = 0
+        self.field_y_min = 0
+
+    def predict(self, obs_msg):
+        # Reading message
+        self.time = round(obs_msg.our_duckie_pose.time, 2)
+
+        other_duckie_y = obs_msg.other_duckie_pose.y
+        other_duckie_theta = obs_msg.other_duckie_pose.theta
+        other_duckie_velocity = obs_msg.other_duckie_velocity
+        self.other_duckie_radius = obs_msg.other_duckie_radius
+
+        # Number of y steps travelled in a time step for each velocity bin
+        if other_duckie_theta != self.reference_theta:
+            self.y_shifts = np.round(self.vel_bins*self.dt*math.cos(other_duckie_theta)/self.y_resolution).astype(int)
+            self.reference_beliefs = {}                                     # References are only valid for one heading
+            self.reference_theta = other_duckie_theta
+
+        y_index = int(round(other_duckie_y/self.y_resolution))
+        vel_probabilities = self.get_vel_probabilities(other_duckie_velocity)
+        if y_index < 0 or y_index >= self.number_y_steps:
+            self.belief = np.zeros((self.number_time_steps, self.number_y_steps, self.number_vel_bins))
+        elif self.warm_start and (np.all(self.y_shifts <= 0) or np.all(self.y_shifts >= 0)):
+            # Warm start: the propagation is Markov, linear and invariant to translations along y, so conditioning on the
+            # observation amounts to shifting the beliefs previously propagated from its velocity bins, started from the edge of
+            # the y range the other duckie drives away from (no probability that was dropped at the other edge can come back).
+            reference_y_index = 0 if np.all(self.y_shifts >= 0) else self.number_y_steps - 1
+            observed_bins = np.flatnonzero(vel_probabilities)
+            if all(k_v in self.reference_beliefs for k_v in observed_bins):
+                self.warm_start_count += 1
+            else:
+                self.full_prediction_count += 1
+            belief = np.zeros((self.number_time_steps, self.number_y_steps, self.number_vel_bins))
+            for k_v in observed_bins:
+                if k_v not in self.reference_beliefs:
+                    self.reference_beliefs[k_v] = self.propagate_from(reference_y_index, np.eye(self.number_vel_bins)[k_v])
+                belief += vel_probabilities[k_v]*self.reference_beliefs[k_v]
+            self.belief = self.shift_along_y(belief, y_index - reference_y_index)
+        else:
+            self.belief = self.propagate_from(y_index, vel_probabilities)
+            self.full_prediction_count += 1
+
+        self.y_marginal = self.belief.sum(axis=2)
+        self.build_collision_field(obs_msg.our_duckie_radius)
+
+    def propagate_from(self, y_index, vel_probabilities):
+        # Propagates the belief over the whole time horizon from a known y index and the probabilities of the velocity bins
+        belief = np.zeros((self.number_time_steps, self.number_y_steps, self.number_vel_bins))
+        belief[0, y_index, :] = vel_probabilities
+        for k_t in range(1, self.number_time_steps):
+            belief[k_t] = self.propagate_step(belief[k_t-1])
+        return belief
+
+    def shift_along_y(self, belief, shift):
+        # Moves a whole belief by shift y steps, dropping what goes out of the y range
+        shifted = np.zeros_like(belief)
+        if shift >= 0:
+            shifted[:, shift:, :] = belief[:, :self.number_y_steps - shift, :]
+        else:
+            shifted[:, :shift, :] = belief[:, -shift:, :]
+        return shifted
+
+    def get_warm_start_stats(self):
+        # Returns how many predictions reused a previous belief and how many were fully propagated
+        return {"warm_start": self.warm_start_count, "full_prediction": self.full_prediction_count}
+
+    def propagate_step(self, belief_at_time):
+        # Velocity changes, then each velocity bin moves along y by its own (integer) number of y steps
+        vel_changed = belief_at_time.dot(self.vel_transition)
+        next_belief = np.zeros_like(belief_at_time)
+        for k_v in range(self.number_vel_bins):
+            shift = self.y_shifts[k_v]
+            if shift >= 0:
+                next_belief[shift:, k_v] = vel_changed[:self.number_y_steps - shift, k_v]
+            else:
+                next_belief[:shift, k_v] = vel_changed[-shift:, k_v]   # Probability going below y = 0 is dropped
+        return next_belief
+
+    def build_collision_field(self, our_duckie_radius):
+        # Precomputes the collision probability around the other duckie lane for every time step, so that a query is a single array index
+        self.field_our_radius = our_duckie_radius
+        collision_distance = self.other_duckie_radius + our_duckie_radius
+        margin_steps = int(math.ceil(collision_distance/self.y_resolution))
+
+        x = -self.road_width/4                                  # Other duckie always in the middle of the road
+        self.field_x_min = x - margin_steps*self.y_resolution
+        self.field_y_min = -margin_steps*self.y_resolution
+        field_x_values = self.field_x_min + self.y_resolution*np.arange(2*margin_steps + 1)
+        field_y_values = self.field_y_min + self.y_resolution*np.arange(self.number_y_steps + 2*margin_steps)
+
+        # Cumulative sum along y: the probability between y indices lo and hi (included) is cum_marginal[:, hi+1] - cum_marginal[:, lo]
+        cum_marginal = np.zeros((self.number_time_steps, self.number_y_steps + 1))
+        cum_marginal[:, 1:] = np.cumsum(self.y_marginal, axis=1)
+
+        self.collision_field = np.zeros((self.number_time_steps, len(field_x_values), len(field_y_values)))
+        for k_x, x_pos in enumerate(field_x_values):
+            sq_half_width = collision_distance**2 - (x_pos - x)**2
+            if sq_half_width < 0:
+                continue
+            half_width = math.sqrt(sq_half_width)
+            lo = np.clip(np.ceil((field_y_values - half_width)/self.y_resolution - 1e-9).astype(int), 0, self.number_y_steps)
+            hi = np.clip(np.floor((field_y_values + half_width)/self.y_resolution + 1e-9).astype(int), -1, self.number_y_steps - 1)
+            hi = np.maximum(hi, lo - 1)
+            self.collision_field[:, k_x, :] = cum_marginal[:, hi + 1] - cum_marginal[:, lo]
+
+    def get_collision_field_state(self):
+        # Everything but the collision field array needed to answer collision queries with it
+        return {"time": self.time, "other_duckie_radius": self.other_duckie_radius, "field_our_radius": self.field_our_radius, "field_x_min": self.field_x_min, "field_y_min": self.field_y_min}
+
+    def set_collision_field_state(self, state, collision_field):
+        # Answers the collision queries with a collision field built by another predictor (for example in another process)
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.collision_field = collision_field
+
+    def get_vel_probabilities(self, velocity):
+        # Probabilities of the velocity bins for an observed velocity: the bin at this velocity, or the two bins around it
+        vel_probabilities = np.zeros(self.number_vel_bins)
+        k_v = min(int(np.searchsorted(self.vel_bins, velocity - 1e-6)), self.number_vel_bins - 1)
+        if k_v == 0 or self.vel_bins[k_v] - velocity < 1e-6:
+            vel_probabilities[k_v] = 1
+        else:
+            weight = (self.vel_bins[k_v] - velocity)/(self.vel_bins[k_v] - self.vel_bins[k_v - 1])
+            vel_probabilities[k_v - 1] = weight
+            vel_probabilities[k_v] = 1 - weight
+        return vel_probabilities
+
+    def get_time_index(self, time):
+        # Index of the last time step before time (None if out of the prediction)
+        k_t = int(math.floor((time - self.time)/self.dt + 1e-6))
+        if k_t < 0 or k_t >= self.number_time_steps:
+            return None
+        return k_t
+
+    def get_from_prediction(self, time, y):
+        k_t = self.get_time_index(time)
+        y_index = int(round(y/self.y_resolution))
+        if k_t is None or y_index < 0 or y_index >= self.number_y_steps:
+            return []
+        return [[self.belief[k_t, y_index, k_v], self.vel_bins[k_v]] for k_v in range(self.number_vel_bins) if self.belief[k_t, y_index, k_v] > 0]
+
+    def get_probability(self, time, y):
+        if time < self.time:
+            rospy.loginfo("[Agent][Predictor] Trying to get probability for a time that has already passed: " + str(time))
+            return 0
+
+        k_t = self.get_time_index(time)
+        y_index = int(round(y/self.y_resolution))
+        if k_t is None or y_index < 0 or y_index >= self.number_y_steps:
+            return 0
+        return self.y_marginal[k_t, y_index]
+
+    def get_collision_probability(self, x_pos, y_pos, time, our_duckie_radius):
+        if time < self.time:
+            rospy.loginfo("[Agent][Predictor] Trying to get probability for a time that has already passed: " + str(time))
+            return 0
+
+        if time >= self.time + self.time_horizon:
+            rospy.loginfo("[Agent][Predictor] Trying to get probability for a time that is further than time horizon: " + str(time))
+            return 0
+
+        k_t = self.get_time_index(time)
+        if k_t is None:
+            return 0
+
+        # The collision field is used for the radius it was built for, up to float rounding (e.g. of the float32 of the messages)
+        if self.field_our_radius is not None and abs(our_duckie_radius - self.field_our_radius) < 1e-6:
+            k_x = int(round((x_pos - self.field_x_min)/self.y_resolution))
+            k_y = int(round((y_pos - self.field_y_min)/self.y_resolution))
+            if k_x < 0 or k_x >= self.collision_field.shape[1] or k_y < 0 or k_y >= self.collision_field.shape[2]:
+                return 0
+            return self.collision_field[k_t, k_x, k_y]
+
+        x = -self.road_width/4                                  # Other duckie always in the middle of the road
+        sq_distances = (y_pos - self.y_values)**2 + (x_pos - x)**2
+        in_collision = sq_distances <= (self.other_duckie_radius + our_duckie_radius)**2
+        return self.y_marginal[k_t, in_collision].sum()
+
+    def get_collision_probabilities(self, x_positions, y_positions, times):
+        # Batched version of get_collision_probability for our duckie radius, using the collision field
+        # Returns an array with the probability of collision for each (x, y, time), 0 outside of the field or of the time horizon
+        x_positions, y_positions, times = np.broadcast_arrays(np.asarray(x_positions, dtype=float), np.asarray(y_positions, dtype=float), np.asarray(times, dtype=float))
+
+        k_t = np.floor((times - self.time)/self.dt + 1e-6).astype(int)
+        k_x = np.round((x_positions - self.field_x_min)/self.y_resolution).astype(int)
+        k_y = np.round((y_positions - self.field_y_min)/self.y_resolution).astype(int)
+        valid = (k_t >= 0) & (k_t < self.number_time_steps) & (k_x >= 0) & (k_x < self.collision_field.shape[1]) & (k_y >= 0) & (k_y < self.collision_field.shape[2])
+
+        probabilities = np.zeros(k_t.shape)
+        probabilities[valid] = self.collision_field[k_t[valid], k_x[valid], k_y[valid]]
+        return probabilities
@@ -5,10 +5,10 @@ Path Planning Sample Code with RRT and Dubins path (author: AtsushiSakai(@Atsush
 
 import random
 import math
-import copy
 import numpy as np
 import dubins_path_planning
 import matplotlib.pyplot as plt
+from spatial_index import SpatialHash
 
 show_animation = True
 
@@ -16,7 +16,8 @@ show_animation = True
 class RRT():
 
     def __init__(self, start, goal, obstacleList, randAreax, randAreay, gridsizex, gridsizey, radius,
-                 goalSampleRate=10, maxIter=60):
+                 goalSampleRate=10, maxIter=60, indexCellSize=None, sampleStep=0.1,
+                 collisionChecker=None, velocity=1.0, maxCollisionProbability=0.0):
 
         #since we haven't et decided how to decide "cost/reward" of every node/sampled point, i've added comment indicating which functions might be depending on this 
         #cost value to do decision making inside rrt
@@ -30,6 +31,14 @@ class RRT():
         randArea:Ramdom Samping Area [min,max]
         GridSize: currently not used anywhere, should hold total traversable area/road dimesions value
         goalSampleRate : out of 100 samples, x times will sample to goal to see if direct path possible
+        indexCellSize: cell size of the spatial hash used for the nearest and near nodes queries, None for vectorized linear scans of the nodes
+                       (the spatial hash is faster from about 8000 nodes, and scans all the nodes below SpatialHash.min_sorted)
+        sampleStep: arc length between the points of the paths used for collision checks and the final course (m),
+                    dt * velocity gives one point per time step
+        collisionChecker: time-indexed checker (see collision_checker.py) giving the probability of collision of the points of
+                          a path reached at given times, None to check the points against all the obstacleList positions
+        velocity: velocity of our duckie (m/s), giving the arrival time at each point of a path from its length from the start
+        maxCollisionProbability: largest probability of collision of a collision free path, with a collisionChecker
 
         """
         self.start = Node(start[0], start[1], start[2])
@@ -48,9 +57,17 @@ class RRT():
         self.goalSampleRate = goalSampleRate
         self.maxIter = maxIter
         self.obstacleList = obstacleList
+        self.indexCellSize = indexCellSize
+        self.index = None
+        self.curvature = 1.0
+        self.sampleStep = sampleStep
+        self.collisionChecker = collisionChecker
+        self.velocity = velocity
+        self.maxCollisionProbability = maxCollisionProbability
 
     def setValues(self, start, goal, obstacleList, randAreax, randAreay, gridsizex, gridsizey, radius,
-                 goalSampleRate=10, maxIter=50):
+                 goalSampleRate=10, maxIter=50, indexCellSize=None, sampleStep=0.1,
+                 collisionChecker=None, velocity=1.0, maxCollisionProbability=0.0):
         """
         Setting Parameter
 
@@ -58,6 +75,11 @@ class RRT():
         goal:Goal Position [x,y]
         obstacleList:obstacle Positions [[x,y,size],...]
         randArea:Ramdom Samping Area [min,max]
+        indexCellSize: cell size of the spatial hash of the nodes, None for vectorized linear scans
+        sampleStep: arc length between the points of the paths (m)
+        collisionChecker: time-indexed collision checker, None to use obstacleList
+        velocity: velocity of our duckie (m/s)
+        maxCollisionProbability: largest probability of collision of a collision free path
 
         """
         self.start = Node(start[0], start[1], start[2])
@@ -76,15 +98,26 @@ class RRT():
         self.goalSampleRate = goalSampleRate
         self.maxIter = maxIter
         self.obstacleList = obstacleList
+        self.indexCellSize = indexCellSize
+        self.index = None
+        self.curvature = 1.0
+        self.sampleStep = sampleStep
+        self.collisionChecker = collisionChecker
+        self.velocity = velocity
+        self.maxCollisionProbability = maxCollisionProbability
 
     def Planning(self, animation=False):
 
-        self.nodeList = [self.start]
+        self.nodes = NodeArrays(self.maxIter + 1)
+        self.nodes.append(self.start)
+        if self.indexCellSize is not None:
+            self.index = SpatialHash(self.indexCellSize)        # kept in sync with nodes: same indices, updated on rewire
+            self.index.insert(self.start.x, self.start.y, self.start.yaw)
         for i in range(self.maxIter):
             if(i % 5 == 0):
                 self.goalSampleRate += 3
             rnd = self.get_random_point() 
-            nind = self.GetNearestListIndex(self.nodeList, rnd)
+            nind = self.GetNearestListIndex(self.nodes, rnd)
 
             newNode = self.steer(rnd, nind)
             #  print(newNode.cost)
@@ -92,7 +125,9 @@ class RRT():
             if self.CollisionCheck(newNode, self.obstacleList):
                 nearinds = self.find_near_nodes(newNode)
                 newNode = self.choose_parent(newNode, nearinds)
-                self.nodeList.append(newNode)
+                self.nodes.append(newNode)
+                if self.index is not None:
+                    self.index.insert(newNode.x, newNode.y, newNode.yaw)
                 self.rewire(newNode, nearinds)
 
             if animation and i % 5 == 0:
@@ -112,23 +147,21 @@ class RRT():
         if len(nearinds) == 0:
             return newNode
 
-        dlist = []
-        for i in nearinds:
-            tNode = self.steer(newNode, i)
+        # Dubins paths from all the near nodes at once, then collision checks from the cheapest one until one is collision free
+        nodes = self.nodes
+        nearinds = np.asarray(nearinds)
+        words, lengths, clens = dubins_path_planning.dubins_path_parameters_batch(
+            nodes.x[nearinds], nodes.y[nearinds], nodes.yaw[nearinds], newNode.x, newNode.y, newNode.yaw, self.curvature)
+        dlist = nodes.cost[nearinds] + clens
+
+        for k in np.argsort(dlist, kind="mergesort"):
+            if dlist[k] == float("inf"):
+                break
+            tNode = self.make_node(newNode, nearinds[k], words[k], lengths[k], dlist[k])
             if self.CollisionCheck(tNode, self.obstacleList):
-                dlist.append(tNode.cost)
-            else:
-                dlist.append(float("inf"))
-
-        mincost = min(dlist)
-        minind = nearinds[dlist.index(mincost)]
-
-        if mincost == float("inf"):
-            print("mincost is inf")
-            return newNode
-
-        newNode = self.steer(newNode, minind)
+                return tNode
 
+        print("mincost is inf")
         return newNode
 
     def pi_2_pi(self, angle):
@@ -136,25 +169,24 @@ class RRT():
 
     def steer(self, rnd, nind):                                             ##this func is computing cost of a node based on path length from another anchor node
         #  print(rnd)
-        curvature = 1.0
+        nodes = self.nodes
 
-        nearestNode = self.nodeList[nind]
+        lengths, mode, clen = dubins_path_planning.dubins_path_parameters(
+            nodes.x[nind], nodes.y[nind], nodes.yaw[nind], rnd.x, rnd.y, rnd.yaw, self.curvature)
 
-        px, py, pyaw, mode, clen = dubins_path_planning.dubins_path_planning(
-            nearestNode.x, nearestNode.y, nearestNode.yaw, rnd.x, rnd.y, rnd.yaw, curvature)
+        #cost is being computed by adding length of path between new node + selected parent to the cost of selected parent
+        newNode = self.make_node(rnd, nind, dubins_path_planning.WORDS.index(mode), lengths, nodes.cost[nind] + clen)
 
-        newNode = copy.deepcopy(nearestNode)
-        newNode.x = px[-1]
-        newNode.y = py[-1]
-        newNode.yaw = pyaw[-1]
+        #should be adding time keeping here, time represnting the time step so that can compare with time step of rolled out obstacle prediction
+        return newNode
 
-        newNode.path_x = px         ## this is a list of points (x coordinates) that is basically the path to this node, dist btw points is kept constant
-        newNode.path_y = py
-        newNode.path_yaw = pyaw
-        newNode.cost += clen        #cost is being computed by adding length of path between new node + selected parent to the cost of selected parent
-        newNode.parent = nind
+    def make_node(self, pose, parent, word, lengths, cost):
+        newNode = Node(pose.x, pose.y, self.pi_2_pi(pose.yaw))     # the Dubins path ends exactly at pose
 
-        #should be adding time keeping here, time represnting the time step so that can compare with time step of rolled out obstacle prediction
+        newNode.mode = int(word)    ## the path to this node is kept as its word and segment lengths, its points are generated by edge_points when needed
+        newNode.lengths = list(lengths)
+        newNode.cost = float(cost)
+        newNode.parent = int(parent)
         return newNode
 
     def get_random_point(self):                                 #we should be restricting the grid where it looks for a random point?
@@ -178,66 +210,85 @@ class RRT():
         YAWTH = np.deg2rad(1.0)
         XYTH = 0.5
 
-        goalinds = []
-        for (i, node) in enumerate(self.nodeList):
-            if self.calc_dist_to_goal(node.x, node.y) <= XYTH:
-                goalinds.append(i)
+        nodes = self.nodes
+        n = len(nodes)
+        goal_close = np.hypot(nodes.x[:n] - self.end.x, nodes.y[:n] - self.end.y) <= XYTH
 
         # angle check
-        fgoalinds = []
-        for i in goalinds:
-            if abs(self.nodeList[i].yaw - self.end.yaw) <= YAWTH:
-                fgoalinds.append(i)
+        fgoalinds = np.flatnonzero(goal_close & (np.abs(nodes.yaw[:n] - self.end.yaw) <= YAWTH))
 
         if len(fgoalinds) == 0:
             return None
 
-        mincost = min([self.nodeList[i].cost for i in fgoalinds])
-        for i in fgoalinds:
-            if self.nodeList[i].cost == mincost:
-                return i
-
-        return None
+        return int(fgoalinds[np.argmin(nodes.cost[fgoalinds])])
 
     def gen_final_course(self, goalind):
         path = [[self.end.x, self.end.y]]
-        while self.nodeList[goalind].parent is not None:
-            node = self.nodeList[goalind]
-            for (ix, iy) in zip(reversed(node.path_x), reversed(node.path_y)):
+        while self.nodes.parent[goalind] >= 0:
+            node = self.nodes.get(goalind)
+            path_x, path_y, _ = self.edge_points(node)
+            for (ix, iy) in zip(reversed(path_x.tolist()), reversed(path_y.tolist())):
                 path.append([ix, iy])
             #  path.append([node.x, node.y])
             goalind = node.parent
         path.append([self.start.x, self.start.y])
         return path
 
+    def gen_final_samples(self, goalind, step):
+        # x, y, yaw arrays along the final course from the start, every step of arc length across the edges
+        # (with step = dt * velocity, the yaws are the orientation to follow at each time step)
+        edges = []
+        while self.nodes.parent[goalind] >= 0:
+            edges.append(self.nodes.get(goalind))
+            goalind = edges[-1].parent
+
+        samples = []
+        offset = 0.0
+        for node in reversed(edges):
+            parent = node.parent
+            px, py, pyaw = dubins_path_planning.dubins_path_sample(
+                self.nodes.x[parent], self.nodes.y[parent], self.nodes.yaw[parent], node.lengths, dubins_path_planning.WORDS[node.mode], self.curvature, step, offset, endpoint=False)
+            samples.append((px, py, pyaw))
+            offset += len(px) * step - sum(node.lengths) * self.curvature     # arc length of the next point from the end of this edge
+        if len(samples) == 0:
+            return np.array([self.start.x]), np.array([self.start.y]), np.array([self.start.yaw])
+        return tuple(np.concatenate(values) for values in zip(*samples))
+
     def calc_dist_to_goal(self, x, y):
         return np.linalg.norm([x - self.end.x, y - self.end.y])
 
     def find_near_nodes(self, newNode):
-        nnode = len(self.nodeList)
+        nnode = len(self.nodes)
         r = 50.0 * math.sqrt((math.log(nnode) / nnode))
         #  r = self.expandDis * 5.0
-        dlist = [(node.x - newNode.x) ** 2 +
-                 (node.y - newNode.y) ** 2 +
-                 (node.yaw - newNode.yaw) ** 2
-                 for node in self.nodeList]
-        nearinds = [dlist.index(i) for i in dlist if i <= r ** 2]
+        if self.index is not None:
+            return self.index.within(newNode.x, newNode.y, newNode.yaw, r)
+        dlist = self.nodes.squared_distances(newNode)
+        nearinds = np.flatnonzero(dlist <= r ** 2).tolist()
         return nearinds
 
     def rewire(self, newNode, nearinds):                                            #this func is using cost to compare nodes and rewire the rrt* tree
 
-        nnode = len(self.nodeList)
+        nodes = self.nodes
+        nnode = len(nodes)
+        if len(nearinds) == 0:
+            return
 
-        for i in nearinds:
-            nearNode = self.nodeList[i]
-            tNode = self.steer(nearNode, nnode - 1)
+        # Dubins paths from the new node to all the near nodes at once
+        nearinds = np.asarray(nearinds)
+        words, lengths, clens = dubins_path_planning.dubins_path_parameters_batch(
+            nodes.x[nnode - 1], nodes.y[nnode - 1], nodes.yaw[nnode - 1], nodes.x[nearinds], nodes.y[nearinds], nodes.yaw[nearinds], self.curvature)
+        costs = nodes.cost[nnode - 1] + clens
 
-            obstacleOK = self.CollisionCheck(tNode, self.obstacleList)
-            imporveCost = nearNode.cost > tNode.cost
+        for k in np.flatnonzero(nodes.cost[nearinds] > costs):          # imporveCost
+            i = int(nearinds[k])
+            tNode = self.make_node(Node(nodes.x[i], nodes.y[i], nodes.yaw[i]), nnode - 1, words[k], lengths[k], costs[k])
 
-            if obstacleOK and imporveCost:
+            if self.CollisionCheck(tNode, self.obstacleList):
                 #  print("rewire")
-                self.nodeList[i] = tNode
+                self.nodes.set(i, tNode)
+                if self.index is not None:
+                    self.index.update(i, tNode.x, tNode.y, tNode.yaw)
 
     def DrawGraph(self, rnd=None):
         """
@@ -246,9 +297,11 @@ class RRT():
         plt.clf()
         if rnd is not None:
             plt.plot(rnd.x, rnd.y, "^k")
-        for node in self.nodeList:
+        for i in range(len(self.nodes)):
+            node = self.nodes.get(i)
             if node.parent is not None:
-                plt.plot(node.path_x, node.path_y, "-g")
+                path_x, path_y, _ = self.edge_points(node)
+                plt.plot(path_x, path_y, "-g")
                 #  plt.plot([node.x, self.nodeList[node.parent].x], [
                 #  node.y, self.nodeList[node.parent].y], "-g")
 
@@ -267,23 +320,41 @@ class RRT():
         #  plt.show()
         #  input()
 
-    def GetNearestListIndex(self, nodeList, rnd):               ##looks for nearest node so that that can be its parent
-        dlist = [(node.x - rnd.x) ** 2 +
-                 (node.y - rnd.y) ** 2 +
-                 (node.yaw - rnd.yaw) ** 2 for node in nodeList]
-        minind = dlist.index(min(dlist))
+    def GetNearestListIndex(self, nodes, rnd):               ##looks for nearest node so that that can be its parent
+        if self.index is not None and nodes is self.nodes:
+            return self.index.nearest(rnd.x, rnd.y, rnd.yaw)
+        minind = int(np.argmin(nodes.squared_distances(rnd)))
 
         return minind
 
-    def CollisionCheck(self, node, obstacleList):                    #extend later, currently penalizing being close to ANY of the rolled out positions in time of any of the obstacles
+    def edge_points(self, node):
+        # Points of the Dubins path from the parent of node to node, generated from its word and segment lengths
+        # (the pose of the parent is read from the tree)
+        parent = node.parent
+        return dubins_path_planning.dubins_path_sample(
+            self.nodes.x[parent], self.nodes.y[parent], self.nodes.yaw[parent], node.lengths, dubins_path_planning.WORDS[node.mode], self.curvature, self.sampleStep)
+
+    def collision_probability(self, node):
+        # Probability of collision along the path from the parent of node to node, all its points being checked at once,
+        # each one at its arrival time (length of the path from the start over the velocity)
+        path_x, path_y, _ = self.edge_points(node)
+        s = np.minimum(np.arange(len(path_x)) * self.sampleStep, sum(node.lengths) * self.curvature)
+        times = (self.nodes.cost[node.parent] * self.curvature + s) / self.velocity
+        return self.collisionChecker.collision_probability(path_x, path_y, times)
+
+    def CollisionCheck(self, node, obstacleList):                    #without collisionChecker, penalizing being close to ANY of the rolled out positions in time of any of the obstacles
+        if node.parent is None:
+            return True
+        if self.collisionChecker is not None:
+            return self.collision_probability(node) <= self.maxCollisionProbability
+        if len(obstacleList) == 0:
+            return True
+        path_x, path_y, _ = self.edge_points(node)
         for obstacle_pos in obstacleList:
-            for (ox, oy, size) in obstacle_pos:
-                for (ix, iy) in zip(node.path_x, node.path_y):
-                    dx = ox - ix
-                    dy = oy - iy
-                    d = dx * dx + dy * dy
-                    if d <= size ** 2:
-                        return False  # collision
+            obstacles = np.asarray(obstacle_pos, dtype=float).reshape(-1, 3)
+            d = (obstacles[:, 0, None] - path_x) ** 2 + (obstacles[:, 1, None] - path_y) ** 2
+            if (d <= obstacles[:, 2, None] ** 2).any():
+                return False  # collision
 
         return True  # safe
 
@@ -294,9 +365,8 @@ class Node():                                        ##initing cost to zero (can
         self.x = x
         self.y = y
         self.yaw = yaw
-        self.path_x = []
-        self.path_y = []
-        self.path_yaw = []
+        self.mode = None            # index in dubins_path_planning.WORDS of the path from the parent
+        self.lengths = None         # segment lengths of the path from the parent
         self.cost = 0.0
         self.parent = None
 
@@ -304,6 +374,69 @@ class Node():                                        ##initing cost to zero (can
         pass
 
 
+class NodeArrays():
+    """
+    RRT* tree in a struct-of-arrays layout: pose, cost and parent of each node, and the Dubins path from its parent
+    as a word index and three segment lengths, so that the memory per node is constant.
+    Parents are -1 and words -1 for the start node.
+    """
+
+    def __init__(self, capacity=64):
+        self.size = 0
+        self.allocate(capacity)
+
+    def __len__(self):
+        return self.size
+
+    def allocate(self, capacity):
+        self.capacity = capacity
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.yaw = np.zeros(capacity)
+        self.cost = np.zeros(capacity)
+        self.parent = np.full(capacity, -1, dtype=np.int32)
+        self.mode = np.full(capacity, -1, dtype=np.int8)
+        self.lengths = np.zeros((capacity, 3))
+
+    def grow(self):
+        # Geometric growth of all the arrays
+        old = dict((name, getattr(self, name)) for name in ["x", "y", "yaw", "cost", "parent", "mode", "lengths"])
+        self.allocate(2 * self.capacity)
+        for name, values in old.items():
+            getattr(self, name)[:self.size] = values[:self.size]
+
+    def append(self, node):
+        if self.size == self.capacity:
+            self.grow()
+        self.size += 1
+        self.set(self.size - 1, node)
+        return self.size - 1
+
+    def set(self, i, node):
+        self.x[i] = node.x
+        self.y[i] = node.y
+        self.yaw[i] = node.yaw
+        self.cost[i] = node.cost
+        self.parent[i] = -1 if node.parent is None else node.parent
+        self.mode[i] = -1 if node.mode is None else node.mode
+        if node.lengths is not None:
+            self.lengths[i] = node.lengths
+
+    def get(self, i):
+        node = Node(float(self.x[i]), float(self.y[i]), float(self.yaw[i]))
+        node.cost = float(self.cost[i])
+        if self.parent[i] >= 0:
+            node.parent = int(self.parent[i])
+            node.mode = int(self.mode[i])
+            node.lengths = self.lengths[i].tolist()
+        return node
+
+    def squared_distances(self, node):
+        # Squared distances in (x, y, yaw) from node to all the nodes of the tree
+        n = self.size
+        return (self.x[:n] - node.x) ** 2 + (self.y[:n] - node.y) ** 2 + (self.yaw[:n] - node.yaw) ** 2
+
+
 #COST to be used CAN BE BASED ON:
 #position wrt center of lane
 #on road or not(dependent on radius of car)
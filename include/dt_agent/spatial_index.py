@@ -0,0 +1,142 @@
+"""
+Spatial index over (x, y, weighted yaw) points, for the nearest neighbour and radius queries of the RRT* planner.
+"""
+
+import math
+import numpy as np
+
+
+class SpatialHash():
+    """
+    Points kept in NumPy columns, with a copy sorted by their cell in a grid of square cells over (x, y). A query finds,
+    with one searchsorted, the range of the sorted points of each row of cells around it, and computes the distances of
+    the points of these ranges at once, the weighted yaw being only used in the distances. The points inserted since the
+    last sort are scanned linearly, and all the points are sorted again once there are more of them than min_unsorted
+    and a sixteenth of the sorted ones. Below min_sorted points, where the NumPy calls of the lookups cost more than
+    computing all the distances, all the points are scanned.
+    """
+
+    cell_offset = 2 ** 30       # cell coordinates are shifted to be positive in the keys: key = (i + offset) * 2**31 + (j + offset)
+    min_unsorted = 256
+    min_sorted = 4096
+
+    def __init__(self, cell_size, yaw_weight=1.0, capacity=64):
+        """
+        cell_size: side of the square cells over (x, y)
+        yaw_weight: weight of the yaw in the distance, squared distances being dx**2 + dy**2 + (yaw_weight*dyaw)**2
+        """
+        self.cell_size = cell_size
+        self.yaw_weight = yaw_weight
+        self.size = 0
+        self.allocate(capacity)
+        self.sorted_size = 0                                    # the points before sorted_size are in the sorted arrays
+        self.sorted_keys = np.zeros(0, dtype=np.int64)
+        self.sorted_indices = np.zeros(0, dtype=np.int64)
+        self.sorted_positions = np.zeros(0, dtype=np.int64)
+        self.sorted_columns = [np.zeros(0)] * 3
+
+    def __len__(self):
+        return self.size
+
+    def allocate(self, capacity):
+        # index -> x, y, weighted yaw of the point, in columns grown geometrically
+        old = [column[:self.size] for column in self.columns] if self.size > 0 else []
+        self.columns = [np.zeros(capacity) for _ in range(3)]
+        for column, values in zip(self.columns, old):
+            column[:self.size] = values
+        self.indices = np.arange(capacity)
+
+    def cell_key(self, x, y):
+        return (int(math.floor(x / self.cell_size)) + self.cell_offset) * 2 ** 31 + int(math.floor(y / self.cell_size)) + self.cell_offset
+
+    def set(self, index, x, y, yaw):
+        self.columns[0][index] = x
+        self.columns[1][index] = y
+        self.columns[2][index] = self.yaw_weight * yaw
+
+    def insert(self, x, y, yaw):
+        # The point gets the next index, like a node appended to the node list
+        if self.size == len(self.indices):
+            self.allocate(2 * len(self.indices))
+        self.set(self.size, x, y, yaw)
+        self.size += 1
+        return self.size - 1
+
+    def update(self, index, x, y, yaw):
+        # Moves the point index, when a node is replaced. A sorted point moved to another cell makes all the points be
+        # sorted again at the next query.
+        if index < self.sorted_size:
+            if self.cell_key(x, y) != self.cell_key(self.columns[0][index], self.columns[1][index]):
+                self.sorted_size = 0
+            else:
+                position = self.sorted_positions[index]
+                for sorted_column, value in zip(self.sorted_columns, (x, y, self.yaw_weight * yaw)):
+                    sorted_column[position] = value
+        self.set(index, x, y, yaw)
+
+    def sort(self):
+        n = self.size
+        keys = (np.floor(self.columns[0][:n] / self.cell_size).astype(np.int64) + self.cell_offset) * 2 ** 31 + np.floor(self.columns[1][:n] / self.cell_size).astype(np.int64) + self.cell_offset
+        self.sorted_indices = np.argsort(keys, kind="mergesort")
+        self.sorted_positions = np.empty(n, dtype=np.int64)      # index -> position in the sorted arrays
+        self.sorted_positions[self.sorted_indices] = np.arange(n)
+        self.sorted_keys = keys[self.sorted_indices]
+        self.sorted_columns = [column[self.sorted_indices] for column in self.columns]
+        self.sorted_size = n
+
+    def candidates(self, x, y, radius):
+        # Indices and columns of the points of the cells overlapping the square of half side radius around (x, y), and of
+        # the unsorted points: all the points at a distance of at most radius are among them. The indices are None for
+        # all the points, in the order of their indices.
+        n = self.size
+        if n < self.min_sorted:
+            return None, [column[:n] for column in self.columns]
+        if n - self.sorted_size > max(self.min_unsorted, self.sorted_size // 16):
+            self.sort()
+        first_row = int(math.floor((x - radius) / self.cell_size)) + self.cell_offset
+        last_row = int(math.floor((x + radius) / self.cell_size)) + self.cell_offset
+        first_column = int(math.floor((y - radius) / self.cell_size)) + self.cell_offset
+        last_column = int(math.floor((y + radius) / self.cell_size)) + self.cell_offset
+        number_rows = last_row - first_row + 1
+        if self.sorted_size == 0 or number_rows * (last_column - first_column + 1) >= self.sorted_size:
+            # Nothing sorted, or more cells than sorted points: all the points
+            return None, [column[:n] for column in self.columns]
+
+        # First and last sorted positions of each row of cells, in one searchsorted
+        rows = [row * 2 ** 31 for row in range(first_row, last_row + 1)]
+        bounds = np.searchsorted(self.sorted_keys, [row + first_column for row in rows] + [row + last_column + 1 for row in rows]).tolist()
+        ranges = [(start, end) for start, end in zip(bounds[:number_rows], bounds[number_rows:]) if end > start]
+        indices = np.concatenate([self.sorted_indices[start:end] for start, end in ranges] + [self.indices[self.sorted_size:n]])
+        columns = [np.concatenate([sorted_column[start:end] for start, end in ranges] + [column[self.sorted_size:n]]) for sorted_column, column in zip(self.sorted_columns, self.columns)]
+        return indices, columns
+
+    def squared_distances(self, columns, x, y, yaw):
+        return (columns[0] - x) ** 2 + (columns[1] - y) ** 2 + (columns[2] - self.yaw_weight * yaw) ** 2
+
+    def nearest(self, x, y, yaw):
+        # Index of the nearest point (the smallest index among equally near points), None if empty.
+        # Once the nearest candidate of a radius is within it, no other point, further than the radius along x or y, can be
+        # as near. Otherwise, the candidates of its distance (slightly enlarged against rounding) hold the nearest point.
+        if self.size == 0:
+            return None
+        radius = self.cell_size
+        while True:
+            indices, columns = self.candidates(x, y, radius)
+            if indices is None:
+                return int(np.argmin(self.squared_distances(columns, x, y, yaw)))
+            if len(indices) > 0:
+                squared_distances = self.squared_distances(columns, x, y, yaw)
+                best = squared_distances.min()
+                if best <= radius ** 2:
+                    return int(indices[squared_distances == best].min())
+                radius = math.sqrt(best) * (1 + 1e-9)
+            else:
+                radius *= 2
+
+    def within(self, x, y, yaw, radius):
+        # Sorted indices of the points at a distance of at most radius
+        indices, columns = self.candidates(x, y, radius)
+        near = self.squared_distances(columns, x, y, yaw) <= radius ** 2
+        if indices is None:
+            return np.flatnonzero(near).tolist()
+        return np.sort(indices[near]).tolist()
@@ -6,31 +6,93 @@ import rospy
 #from geometry_msgs import Pose2D
 
 class Manager(object):
+    initial_capacity = 1024
+    time_tolerance = 1e-4
 
-    def __init__(self, rewards):
+    def __init__(self, rewards, recorder=None, keep_records=True):
         # counts Agent points based on safety_status and ground_status
         # logs recording and visualization
         # counts timesteps and starts and stops sim
         self.rewards = rewards
 
-        self.time = []
-        self.rewards_log = []
-        self.score_log = []
-        self.our_bot_path = []
-        self.other_bot_path = []
-        self.safety_statuses = []
-        self.ground_types = []
+        # With an EpisodeRecorder, the records of this episode are streamed to its file. Without keep_records, they are not
+        # kept in memory (get_records is then empty).
+        self.recorder = recorder
+        self.keep_records = keep_records
+        if self.recorder is not None:
+            self.recorder.start_episode()
+
+        # Running score, number of steps and time spent in each safety status and on each ground type, and distance between
+        # the bots over the episode, and records stored by column in arrays doubled when full, the first length entries being used
+        self.score = 0
+        self.number_steps = 0
+        self.last_time = 0.0
+        self.safety_status_counts = dict((status.value, 0) for status in SafetyStatus)
+        self.safety_status_times = dict((status.value, 0.0) for status in SafetyStatus)
+        self.ground_type_counts = dict((ground.value, 0) for ground in Ground)
+        self.ground_type_times = dict((ground.value, 0.0) for ground in Ground)
+        self.min_distance = float("inf")
+        self.sum_distance = 0.0
+        self.length = 0
+        self.allocate(self.initial_capacity if keep_records else 0)
+
+    def allocate(self, capacity):
+        self.set_columns(self.new_columns(capacity))
+
+    def new_columns(self, capacity):
+        # time, rewards, scores, paths of the bots (x, y, theta) and safety statuses and ground types
+        return (np.zeros(capacity), np.zeros(capacity), np.zeros(capacity), np.zeros((capacity, 3)), np.zeros((capacity, 3)),
+                np.zeros(capacity, dtype=np.int32), np.zeros(capacity, dtype=np.int32))
+
+    def set_columns(self, columns):
+        self.time, self.rewards_log, self.score_log, self.our_bot_path, self.other_bot_path, self.safety_statuses, self.ground_types = columns
+
+    def grow(self):
+        # The records are copied into the new columns before they replace the full ones, so that the service callbacks,
+        # running in other threads, always read the first length records from either of them
+        columns = self.new_columns(2*len(self.time))
+        for column, record in zip(columns, self.get_records()):
+            column[:len(record)] = record
+        self.set_columns(columns)
 
     def step(self, state_msg):
-        self.time.append(state_msg.time)
-        self.rewards_log.append(self.calc_reward(state_msg.safety_status, state_msg.ground_type))
-        self.score_log.append(sum(self.rewards_log))
-        self.our_bot_path.append(state_msg.our_duckie_pose)
-        self.other_bot_path.append(state_msg.other_duckie_pose)
-        self.safety_statuses.append(state_msg.safety_status)
-        self.ground_types.append(state_msg.ground_type)
+        reward = self.calc_reward(state_msg.safety_status, state_msg.ground_type)
+        self.score += reward
+        self.update_statistics(state_msg)
+        our_pose = (state_msg.our_duckie_pose.x, state_msg.our_duckie_pose.y, state_msg.our_duckie_pose.theta)
+        other_pose = (state_msg.other_duckie_pose.x, state_msg.other_duckie_pose.y, state_msg.other_duckie_pose.theta)
+        if self.recorder is not None:
+            self.recorder.record(state_msg.time, reward, self.score, our_pose, other_pose, state_msg.safety_status, state_msg.ground_type)
+        if not self.keep_records:
+            return
+
+        if self.length == len(self.time):
+            self.grow()
+        k = self.length
+        self.time[k] = state_msg.time
+        self.rewards_log[k] = reward
+        self.score_log[k] = self.score
+        self.our_bot_path[k] = our_pose
+        self.other_bot_path[k] = other_pose
+        self.safety_statuses[k] = state_msg.safety_status
+        self.ground_types[k] = state_msg.ground_type
+        self.length += 1
 
 
+    def update_statistics(self, state_msg):
+        # A step lasts from the previous state to this one
+        duration = state_msg.time - self.last_time
+        self.last_time = state_msg.time
+        self.number_steps += 1
+        self.safety_status_counts[state_msg.safety_status] += 1
+        self.safety_status_times[state_msg.safety_status] += duration
+        self.ground_type_counts[state_msg.ground_type] += 1
+        self.ground_type_times[state_msg.ground_type] += duration
+
+        distance = math.hypot(state_msg.our_duckie_pose.x - state_msg.other_duckie_pose.x, state_msg.our_duckie_pose.y - state_msg.other_duckie_pose.y)
+        self.min_distance = min(self.min_distance, distance)
+        self.sum_distance += distance
+
     def calc_reward(self, safety_status, ground_type):
         reward = 0
 
@@ -50,7 +112,35 @@ class Manager(object):
         return reward
 
     def get_records(self):
-        return self.time, self.rewards_log, self.score_log, self.our_bot_path, self.other_bot_path, self.safety_statuses, self.ground_types
+        # Views (not copies, valid until the next step) of the recorded columns, the paths being (n, 3) arrays of x, y, theta
+        n = self.length
+        return self.time[:n], self.rewards_log[:n], self.score_log[:n], self.our_bot_path[:n], self.other_bot_path[:n], self.safety_statuses[:n], self.ground_types[:n]
+
+    def get_records_range(self, start_index=0, max_count=0, start_time=None, end_time=None):
+        # Index of the first record and views of the records from start_index, at most max_count of them (0 for all), with a
+        # time in [start_time, end_time] when given (up to time_tolerance, the times being sums of dt and the bounds float32)
+        records = self.get_records()
+        time = records[0]
+        start, end = max(start_index, 0), len(time)
+        if start_time is not None:
+            start = max(start, np.searchsorted(time, start_time - self.time_tolerance, "left"))
+        if end_time is not None:
+            end = min(end, np.searchsorted(time, end_time + self.time_tolerance, "right"))
+        if max_count > 0:
+            end = min(end, start + max_count)
+        end = max(start, end)
+        return start, tuple(record[start:end] for record in records)
+
+    def get_summary(self):
+        # Aggregates over the whole episode, available even if the records are not kept
+        # (counts and times by safety status and ground type value, distances between the centers of the bots)
+        mean_distance = self.sum_distance / self.number_steps if self.number_steps > 0 else float("inf")
+        return {"time": self.last_time, "score": self.score, "number_steps": self.number_steps, "safety_status_counts": dict(self.safety_status_counts), "safety_status_times": dict(self.safety_status_times), "ground_type_counts": dict(self.ground_type_counts), "ground_type_times": dict(self.ground_type_times), "min_distance": self.min_distance, "mean_distance": mean_distance}
 
     def get_current_score(self):
-        return self.score_log[-1]
\ No newline at end of file
+        return self.score
+
+    def close(self):
+        # Writes the end of the episode file
+        if self.recorder is not None:
+            self.recorder.end_episode()
@@ -0,0 +1,126 @@
+import os
+import re
+import glob
+import struct
+import numpy as np
+
+# Episode files: a 16 bytes header (magic, version, row size, number of rows) followed by fixed-width rows, appended as the
+# episode runs. The number of rows is written when the episode ends, it is 0 until then.
+RECORD_DTYPE = np.dtype([("time", "<f8"), ("reward", "<f8"), ("score", "<f8"), ("our_duckie_pose", "<f8", (3,)), ("other_duckie_pose", "<f8", (3,)), ("safety_status", "<i4"), ("ground_type", "<i4")])
+HEADER_FORMAT = "<6sHII"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+HEADER_ROWS_OFFSET = struct.calcsize(HEADER_FORMAT[:-1])
+MAGIC = b"DTEPIS"
+VERSION = 1
+EPISODE_FILE_PATTERN = "episode_%06d.rec"
+EPISODE_FILE_REGEX = re.compile(r"episode_(\d+)\.rec$")
+
+
+class EpisodeRecorder(object):
+    # Streams the records of the manager to one append-only file per episode in directory, writing them every flush_every rows,
+    # so that the memory used does not grow with the length of the episodes
+
+    def __init__(self, directory, flush_every=100):
+        self.directory = directory
+        self.flush_every = flush_every
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self.buffer = np.zeros(flush_every, dtype=RECORD_DTYPE)
+        self.buffered = 0
+        self.rows = 0           # Rows written to the file of the episode
+        self.file = None
+        self.path = None
+        # Next episode number, after the highest one already in directory
+        self.episode = max([episode_number(path) for path in list_episodes(directory)] + [-1]) + 1
+
+    def start_episode(self):
+        self.end_episode()
+        self.path = os.path.join(self.directory, EPISODE_FILE_PATTERN % self.episode)
+        self.episode += 1
+        # An existing file is never overwritten (if it was created since the directory was listed, this fails)
+        self.file = os.fdopen(os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644), "wb")
+        self.file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, RECORD_DTYPE.itemsize, 0))
+        self.file.flush()
+        self.rows = 0
+
+    def record(self, time, reward, score, our_duckie_pose, other_duckie_pose, safety_status, ground_type):
+        row = self.buffer[self.buffered]
+        row["time"] = time
+        row["reward"] = reward
+        row["score"] = score
+        row["our_duckie_pose"] = our_duckie_pose
+        row["other_duckie_pose"] = other_duckie_pose
+        row["safety_status"] = safety_status
+        row["ground_type"] = ground_type
+        self.buffered += 1
+        if self.buffered == self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self.file is not None and self.buffered > 0:
+            self.file.write(self.buffer[:self.buffered].tobytes())
+            self.file.flush()
+            self.rows += self.buffered
+        self.buffered = 0
+
+    def end_episode(self):
+        if self.file is not None:
+            self.flush()
+            self.file.seek(HEADER_ROWS_OFFSET)
+            self.file.write(struct.pack("<I", self.rows))
+            self.file.close()
+            self.file = None
+
+    def close(self):
+        self.end_episode()
+
+
+def list_episodes(directory):
+    # Paths of the episode files in directory, sorted by episode number
+    return sorted((path for path in glob.glob(os.path.join(directory, "episode_*.rec")) if EPISODE_FILE_REGEX.search(path)), key=episode_number)
+
+
+def episode_number(path):
+    return int(EPISODE_FILE_REGEX.search(path).group(1))
+
+
+def load_episode(path):
+    # Read-only memory map of the rows of an episode file, a structured array of RECORD_DTYPE (fields time, reward, score,
+    # our_duckie_pose, other_duckie_pose, safety_status, ground_type). The rows of an ended episode must match the number
+    # of rows of its header. For an episode being written (or interrupted), the rows written so far are read, a partly
+    # written last row being left out.
+    with open(path, "rb") as f:
+        magic, version, row_size, header_rows = struct.unpack(HEADER_FORMAT, f.read(HEADER_SIZE))
+    if magic != MAGIC or version != VERSION or row_size != RECORD_DTYPE.itemsize:
+        raise ValueError("%s is not an episode file of version %d" % (path, VERSION))
+    number_rows = (os.path.getsize(path) - HEADER_SIZE) // row_size
+    if header_rows > 0 and number_rows != header_rows:
+        raise ValueError("%s has %d rows instead of the %d rows of its header" % (path, number_rows, header_rows))
+    if number_rows == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(number_rows,))
+
+
+def load_episodes(directory):
+    # Lazy sequence of the episodes in directory: each episode is memory mapped when it is indexed or reached by iteration,
+    # so that only the episodes held by the caller keep a mapping open
+    return EpisodeSequence(list_episodes(directory))
+
+
+class EpisodeSequence(object):
+
+    def __init__(self, paths):
+        self.paths = paths
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return EpisodeSequence(self.paths[index])
+        return load_episode(self.paths[index])
+
+    def __iter__(self):
+        for path in self.paths:
+            yield load_episode(path)
@@ -1,3 +1,4 @@
 from .bot import *
 from .world import *
+from .batch_world import *
 from .visualizer import *
@@ -0,0 +1,97 @@
+import numpy as np
+import rospy
+from bot import Bot
+from dt_comm.enums import Ground, SafetyStatus
+
+
+class BatchWorld(object):
+    # number_episodes independent episodes of the World, stored as arrays (one entry per episode) and stepped together.
+    # Each step follows the same rules as Bot.drive, MyBot, ConstantSpeedBot and UnstableSpeedBot, World.check_safety and
+    # World.check_ground.
+
+    def __init__(self, sim_params, world_params, our_duckie_params, other_duckie_params, number_episodes, rng=np.random):
+        self.dt = sim_params["dt"]
+        self.road_width = world_params["road_width"]
+        self.number_episodes = number_episodes
+        self.rng = rng          # Random draws of the unstable speed duckies, with a random_sample(size) method
+
+        self.our_duckie_params = our_duckie_params
+        self.other_duckie_params = other_duckie_params
+        self.our_radius = our_duckie_params["radius"]
+        self.other_radius = other_duckie_params["radius"]
+        self.other_type = other_duckie_params["type"]
+        if self.other_type not in ["constant_speed_duckie", "unstable_speed_duckie"]:
+            rospy.logerr("[sim_node][batch_world] Unknown other duckie type. Look in pathplan_uncertainty/config/sim.yaml and make sure it is fine!")
+        if self.other_type == "unstable_speed_duckie":
+            self.other_max_acceleration = other_duckie_params["max_acceleration"]
+            self.other_max_velocity = other_duckie_params["max_velocity"]
+            self.other_min_velocity = other_duckie_params["min_velocity"]
+
+        self.reset()
+
+    def reset(self):
+        # All the episodes back to the start poses, with empty plans
+        n = self.number_episodes
+        self.time = 0
+        self.our_poses = np.tile(np.array(self.our_duckie_params["start_pose"], dtype=float), (n, 1))         # (n, 3) x, y, theta
+        self.our_velocities = np.full(n, float(self.our_duckie_params["velocity"]))
+        self.other_poses = np.tile(np.array(self.other_duckie_params["start_pose"], dtype=float), (n, 1))
+        self.other_velocities = np.full(n, float(self.other_duckie_params["velocity"]))
+
+        self.plans = np.zeros((n, 0))                   # Orientation sequences, padded after their length
+        self.plan_lengths = np.zeros(n, dtype=int)
+        self.plan_indices = np.zeros(n, dtype=int)      # Next orientation to execute in each plan
+
+        self.safety_statuses = self.check_safety(self.our_poses, self.other_poses)
+        self.ground_types = self.check_ground(self.our_poses[:, 0], self.our_radius)
+
+    def update_our_duckie_plans(self, plans, episodes=None):
+        # Replaces the plans of the episodes (all of them by default) by plans, a list of orientation sequences
+        episodes = np.arange(self.number_episodes) if episodes is None else np.asarray(episodes)
+        length = max([len(plan) for plan in plans] + [0])
+        if length > self.plans.shape[1]:
+            self.plans = np.hstack((self.plans, np.zeros((self.number_episodes, length - self.plans.shape[1]))))
+        for episode, plan in zip(episodes, plans):
+            self.plans[episode, :len(plan)] = plan
+        self.plan_lengths[episodes] = [len(plan) for plan in plans]
+        self.plan_indices[episodes] = 0
+
+    def step(self):
+        # Our duckies follow their plans, or turn back towards 0 without moving once a plan is over (MyBot.sample_plan)
+        planned = self.plan_indices < self.plan_lengths
+        angles = np.zeros(self.number_episodes)
+        angles[planned] = self.plans[planned, self.plan_indices[planned]]
+        self.plan_indices[planned] += 1
+        self.drive(self.our_poses, angles, np.where(planned, self.our_velocities, 0.0))
+
+        if self.other_type == "unstable_speed_duckie":
+            random_accelerations = (self.rng.random_sample(self.number_episodes) - 0.5) * self.other_max_acceleration
+            self.other_velocities = np.clip(self.other_velocities + random_accelerations * self.dt, self.other_min_velocity, self.other_max_velocity)
+        self.drive(self.other_poses, self.other_poses[:, 2], self.other_velocities)
+
+        self.time += self.dt
+        self.ground_types = self.check_ground(self.our_poses[:, 0], self.our_radius)
+        self.safety_statuses = self.check_safety(self.our_poses, self.other_poses)
+        return self.safety_statuses, self.ground_types
+
+    def drive(self, poses, angles, velocities):
+        # Bot.drive for all the episodes, in place
+        angles = np.clip(angles, poses[:, 2] - Bot.limit, poses[:, 2] + Bot.limit)
+        poses[:, 2] = angles
+        poses[:, 0] += np.sin(angles) * velocities * self.dt
+        poses[:, 1] += np.cos(angles) * velocities * self.dt
+
+    def get_state(self):
+        return self.time, self.our_poses, self.our_velocities, self.safety_statuses, self.ground_types, self.other_poses, self.other_velocities
+
+    def check_safety(self, our_poses, other_poses):
+        # Safety status values (see dt_comm/enums) of each episode
+        sq_distances = (our_poses[:, 0] - other_poses[:, 0])**2 + (our_poses[:, 1] - other_poses[:, 1])**2
+        return np.where(sq_distances < (self.our_radius + self.other_radius)**2, SafetyStatus.COLLISION.value, SafetyStatus.FINE.value)
+
+    def check_ground(self, x, radius):
+        # Ground type values (see dt_comm/enums) of duckies at x
+        right_lane = np.abs(x) <= 0.25*self.road_width
+        wrong_lane = (x < -0.25*self.road_width) & (x >= -0.75*self.road_width)
+        partially_out = ((x > -0.75*self.road_width - radius) & (x < -0.75*self.road_width)) | ((x > 0.25*self.road_width) & (x < 0.25*self.road_width + radius))
+        return np.select([right_lane, wrong_lane, partially_out], [Ground.RIGHT_LANE.value, Ground.WRONG_LANE.value, Ground.PARTIALLY_OUT_OF_ROAD.value], Ground.LOST.value)
@@ -0,0 +1,82 @@
+from world import World
+from dt_manager.manager import Manager
+from pathplan_uncertainty.msg import Pose2DTimeStep, WorldState, Observation
+
+
+def make_pose_msg(time, pose):
+    pose_msg = Pose2DTimeStep()
+    pose_msg.time = time
+    pose_msg.x = pose[0]
+    pose_msg.y = pose[1]
+    pose_msg.theta = pose[2]
+    return pose_msg
+
+
+def make_observation_msg(world):
+    # Same observation as the one published by the simulator node on /sim/obs/observations
+    time, ourd_p, ourd_v, _, _, othd_p, othd_v = world.get_state()
+    obs_msg = Observation()
+    obs_msg.our_duckie_pose = make_pose_msg(time, ourd_p)
+    obs_msg.our_duckie_velocity = ourd_v
+    obs_msg.our_duckie_radius = world.my_bot.radius
+    obs_msg.other_duckie_pose = make_pose_msg(time, othd_p)
+    obs_msg.other_duckie_velocity = othd_v
+    obs_msg.other_duckie_radius = world.other_bot.radius
+    return obs_msg
+
+
+def make_world_state_msg(world):
+    # Same state as the one published by the simulator node on /sim/gt/world_state
+    time, ourd_p, _, ourd_ss, ourd_gt, othd_p, _ = world.get_state()
+    world_state_msg = WorldState()
+    world_state_msg.time = time
+    world_state_msg.our_duckie_pose = make_pose_msg(time, ourd_p)
+    world_state_msg.other_duckie_pose = make_pose_msg(time, othd_p)
+    world_state_msg.safety_status = ourd_ss.value
+    world_state_msg.ground_type = ourd_gt.value
+    return world_state_msg
+
+
+class HeadlessSimulation(object):
+    # Runs the simulator, the agent and the manager in-process, without ROS topics nor sleeping: each command of the agent
+    # is executed in lock-step, in the same order as with the nodes. The agent gets the observation when the previous command
+    # starts, and its plan is executed once the computation time steps of the previous command have been simulated.
+
+    def __init__(self, sim_params, world_params, our_duckie_params, other_duckie_params, agent, rewards, recorder=None, keep_records=True):
+        self.sim_params = sim_params
+        self.world_params = world_params
+        self.our_duckie_params = our_duckie_params
+        self.other_duckie_params = other_duckie_params
+        self.agent = agent
+        self.rewards = rewards
+        self.recorder = recorder            # EpisodeRecorder the episodes are streamed to, and whether the managers keep them in memory
+        self.keep_records = keep_records
+
+        self.world = None
+        self.manager = None
+
+    def run_episode(self, number_steps):
+        # Runs an episode of at least number_steps time steps (the last command is executed until its end) from the start poses
+        # and a reset agent, independently of the previous episodes, returns the manager holding its records
+        self.world = World(self.sim_params, self.world_params, self.our_duckie_params, self.other_duckie_params)
+        self.manager = Manager(self.rewards, self.recorder, self.keep_records)
+        self.agent.reset()
+
+        plan = []
+        timesteps = 1
+        steps = 0
+        while steps < number_steps:
+            obs_msg = make_observation_msg(self.world)
+            self.world.update_our_duckie_plan(plan)
+            for k in range(timesteps):
+                self.world.step()
+                self.manager.step(make_world_state_msg(self.world))
+            steps += timesteps
+            if steps < number_steps:
+                plan, timesteps = self.agent.compute_our_plan(obs_msg)
+        self.manager.close()
+        return self.manager
+
+    def run_episodes(self, number_episodes, number_steps):
+        # Final scores of number_episodes episodes
+        return [self.run_episode(number_steps).get_current_score() for _ in range(number_episodes)]
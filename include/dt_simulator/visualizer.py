@@ -17,6 +17,10 @@ class Visualizer(object):
         self.m2pix = image_params["m2pix"]
         self.y_baseline = image_params["y_baseline"]
 
+        # The road is drawn once, each state image is a copy of it in a reused buffer
+        self.base_image = self.create_base_image()
+        self.image = np.empty_like(self.base_image)
+
         
     def create_base_image(self):
         # Create road image
@@ -51,21 +55,28 @@ class Visualizer(object):
         u_bot = int(x*self.m2pix + center_u)
         v_bot = int(center_y - y*self.m2pix)
         
-        # Fill circle around this position with given radius
-        for u in range(u_bot-radius_pix, u_bot+radius_pix):     # For pixels the square around the bot
-            for v in range(v_bot-radius_pix, v_bot+radius_pix):
-                if ((u-u_bot)*(u-u_bot) + (v-v_bot)*(v-v_bot)) < radius_pix*radius_pix: # Check if in a circle shape
-                    if v < self.image_height and v >= 0 and u < self.image_width and u >= 0:   # Check that it is in the image dimensions
-                        image[v, u] = color_code
-                        if abs((u-u_bot) - math.tan(theta)*(v_bot-v)) <= 1.5 and (v_bot-v)*math.cos(theta+0.01) >= 0: # Check if point is on orientation line and in the right direction
-                            image[v, u] = (0, 0, 0)                                     # Put in black
-
+        # Square of pixels around the bot, clipped to the image dimensions
+        u_min, u_max = max(u_bot-radius_pix, 0), min(u_bot+radius_pix, self.image_width)
+        v_min, v_max = max(v_bot-radius_pix, 0), min(v_bot+radius_pix, self.image_height)
+        if u_min >= u_max or v_min >= v_max:
+            return image
+        du = np.arange(u_min, u_max)[np.newaxis, :] - u_bot
+        dv = v_bot - np.arange(v_min, v_max)[:, np.newaxis]
+
+        # Fill circle around this position with given radius, and put in black the points on the orientation line in the right direction
+        circle = du*du + dv*dv < radius_pix*radius_pix
+        line = circle & (np.abs(du - math.tan(theta)*dv) <= 1.5) & (dv*math.cos(theta+0.01) >= 0)
+        window = image[v_min:v_max, u_min:u_max]
+        window[circle] = color_code
+        window[line] = (0, 0, 0)
 
         return image
 
 
     def create_image_state(self, our_duckie_pose, other_duckie_pose):
-        image = self.create_base_image()
+        # The returned image is overwritten by the next call
+        image = self.image
+        np.copyto(image, self.base_image)
         image = self.add_bot(image, our_duckie_pose, self.our_duckie_radius, (0, 0, 255)) # Adding our bot in red
         image = self.add_bot(image, other_duckie_pose, self.other_duckie_radius, (0, 255, 255)) # Adding other bot in yellow
         return image
\ No newline at end of file
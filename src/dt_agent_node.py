@@ -17,9 +17,22 @@ class AgentNode(object):
         self.vel_resolution = rospy.get_param("/agent/predictor/vel_resolution")
         self.y_resolution = rospy.get_param("/agent/predictor/y_resolution")
         self.y_horizon = rospy.get_param("/agent/predictor/y_horizon")
+        self.predictor_type = rospy.get_param("/agent/predictor/type")
+        self.predictor_warm_start = rospy.get_param("/agent/predictor/warm_start")
+        self.planner_type = rospy.get_param("/agent/planner/type")
+        self.planner_budget = rospy.get_param("/agent/planner/budget")
+        self.planner_deadline = rospy.get_param("/agent/planner/deadline")
+        self.planner_deadline_ms = rospy.get_param("/agent/planner/deadline_ms")
+        self.planner_reuse_subtree = rospy.get_param("/agent/planner/reuse_subtree")
+        self.planner_workers = rospy.get_param("/agent/planner/workers")
+        self.planner_worker_budget = rospy.get_param("/agent/planner/worker_budget")
+        self.planner_rollout_batch_size = rospy.get_param("/agent/planner/rollout_batch_size")
+        self.planner_transposition_table_size = rospy.get_param("/agent/planner/transposition_table_size")
+        self.planner_transposition_xy_resolution = rospy.get_param("/agent/planner/transposition_xy_resolution")
+        self.planner_transposition_angle_resolution = rospy.get_param("/agent/planner/transposition_angle_resolution")
         self.comp_time_mean = rospy.get_param("/agent/computation_time/mean")
         self.comp_time_std_dev = rospy.get_param("/agent/computation_time/std_dev")        
-        self.agent_params = {"time_horizon": self.time_horizon, "vel_resolution": self.vel_resolution, "y_resolution": self.y_resolution, "y_horizon": self.y_horizon, "comp_time_mean": self.comp_time_mean, "comp_time_std_dev": self.comp_time_std_dev}
+        self.agent_params = {"time_horizon": self.time_horizon, "vel_resolution": self.vel_resolution, "y_resolution": self.y_resolution, "y_horizon": self.y_horizon, "comp_time_mean": self.comp_time_mean, "comp_time_std_dev": self.comp_time_std_dev, "predictor_type": self.predictor_type, "warm_start": self.predictor_warm_start, "planner_type": self.planner_type, "planner_budget": self.planner_budget, "planner_deadline": self.planner_deadline, "planner_deadline_ms": self.planner_deadline_ms, "planner_reuse_subtree": self.planner_reuse_subtree, "planner_workers": self.planner_workers, "planner_worker_budget": self.planner_worker_budget, "planner_rollout_batch_size": self.planner_rollout_batch_size, "planner_transposition_table_size": self.planner_transposition_table_size, "planner_transposition_xy_resolution": self.planner_transposition_xy_resolution, "planner_transposition_angle_resolution": self.planner_transposition_angle_resolution}
 
         ## Sim parameters
         self.dt = rospy.get_param("/sim/dt")
@@ -95,6 +108,7 @@ class AgentNode(object):
 
 
     def onShutdown(self):
+        self.agent.planner.close()
         rospy.loginfo("[AgentNode] Shutdown.")
 
 
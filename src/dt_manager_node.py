@@ -3,9 +3,11 @@
 import rospy
 from std_msgs.msg import Int32
 from geometry_msgs.msg import Pose2D
-from pathplan_uncertainty.msg import Int32TimeStep, Pose2DTimeStep, WorldState
+from pathplan_uncertainty.msg import Int32TimeStep, Pose2DTimeStep, WorldState, ManagerSummary
 from pathplan_uncertainty.srv import ManagerRecords, ManagerRecordsResponse
 from dt_manager.manager import Manager
+from dt_manager.recorder import EpisodeRecorder
+from dt_comm.enums import SafetyStatus
 
 
 class ManagerNode(object):
@@ -22,14 +24,25 @@ class ManagerNode(object):
         rwrd_lost = rospy.get_param("/reward/type_lost")
         self.rewards = {"fine": rwrd_fine, "collision": rwrd_collision, "right_lane": rwrd_right_lane, "wrong_lane": rwrd_wrong_lane, "part_out": rwrd_part_out, "lost": rwrd_lost}
 
+        self.keep_records = rospy.get_param("/manager/keep_records")
+        self.recorder_directory = rospy.get_param("/manager/recorder/directory")
+        self.recorder_flush_every = rospy.get_param("/manager/recorder/flush_every")
+        self.summary_rate = rospy.get_param("/manager/summary_rate")
+
         # Manager object
-        self.manager = Manager(self.rewards)
+        self.recorder = EpisodeRecorder(self.recorder_directory, self.recorder_flush_every) if self.recorder_directory else None
+        self.manager = Manager(self.rewards, self.recorder, self.keep_records)
 
         # Subscriber
         self.sub_pose_our_duckie = rospy.Subscriber("/sim/gt/world_state",WorldState, self.world_state_cb)
 
         # Publisher
         self.pub_score = rospy.Publisher("/manager/current_score", Int32, queue_size=1)
+        self.pub_summary = rospy.Publisher("/manager/summary", ManagerSummary, queue_size=1)
+
+        # Timer
+        if self.summary_rate > 0:
+            self.summary_timer = rospy.Timer(rospy.Duration(1.0/self.summary_rate), self.publish_summary)
         
         # Service
         self.get_records_serv = rospy.Service('/manager/get_manager_records',ManagerRecords, self.manager_records_cb_srv)
@@ -44,20 +57,65 @@ class ManagerNode(object):
         self.pub_score.publish(score_msg)
 
 
+    def publish_summary(self, event):
+        summary = self.manager.get_summary()
+        summary_msg = ManagerSummary()
+        summary_msg.time = summary["time"]
+        summary_msg.score = summary["score"]
+        summary_msg.number_steps = summary["number_steps"]
+        summary_msg.safety_status_values = sorted(summary["safety_status_counts"])
+        summary_msg.safety_status_counts = [summary["safety_status_counts"][value] for value in summary_msg.safety_status_values]
+        summary_msg.safety_status_times = [summary["safety_status_times"][value] for value in summary_msg.safety_status_values]
+        summary_msg.ground_type_values = sorted(summary["ground_type_counts"])
+        summary_msg.ground_type_counts = [summary["ground_type_counts"][value] for value in summary_msg.ground_type_values]
+        summary_msg.ground_type_times = [summary["ground_type_times"][value] for value in summary_msg.ground_type_values]
+        summary_msg.min_distance = summary["min_distance"]
+        summary_msg.mean_distance = summary["mean_distance"]
+        self.pub_summary.publish(summary_msg)
+
+
     def manager_records_cb_srv(self, req_msg):
-        # Response is all the records from the manager
-        time, rewards, score, path_our_duckie, path_other_duckie, safety_statuses, ground_types = self.manager.get_records()
+        # Response is the summary of the episode, and unless summary_only, the requested page of records from the manager
         response = ManagerRecordsResponse()
-        response.safety_statuses = safety_statuses
-        response.ground_types = ground_types
-        response.time = time
-        response.rewards = rewards
-        response.score =  score
-        response.path_our_duckie = path_our_duckie
-        response.path_other_duckie = path_other_duckie
+        summary = self.manager.get_summary()
+        response.current_score = summary["score"]
+        response.number_steps = summary["number_steps"]
+        response.collision_count = summary["safety_status_counts"][SafetyStatus.COLLISION.value]
+        response.ground_type_values = sorted(summary["ground_type_counts"])
+        response.ground_type_counts = [summary["ground_type_counts"][value] for value in response.ground_type_values]
+        response.total_count = self.manager.length
+        if req_msg.summary_only:
+            return response
+
+        if req_msg.use_time_window:
+            start_index, records = self.manager.get_records_range(req_msg.start_index, req_msg.max_count, req_msg.start_time, req_msg.end_time)
+        else:
+            start_index, records = self.manager.get_records_range(req_msg.start_index, req_msg.max_count)
+        time, rewards, score, path_our_duckie, path_other_duckie, safety_statuses, ground_types = records
+        response.start_index = start_index
+        response.safety_statuses = safety_statuses.tolist()
+        response.ground_types = ground_types.tolist()
+        response.time = time.tolist()
+        response.rewards = rewards.tolist()
+        response.score =  score.tolist()
+        response.path_our_duckie = self.path_msgs(time, path_our_duckie)
+        response.path_other_duckie = self.path_msgs(time, path_other_duckie)
         return response
 
+    def path_msgs(self, time, path):
+        # Pose2DTimeStep messages of a (n, 3) path of x, y, theta
+        pose_msgs = []
+        for t, (x, y, theta) in zip(time.tolist(), path.tolist()):
+            pose_msg = Pose2DTimeStep()
+            pose_msg.time = t
+            pose_msg.x = x
+            pose_msg.y = y
+            pose_msg.theta = theta
+            pose_msgs.append(pose_msg)
+        return pose_msgs
+
     def onShutdown(self):
+        self.manager.close()
         rospy.loginfo("[ManagerNode] Shutdown.")
 
 
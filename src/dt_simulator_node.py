@@ -4,13 +4,16 @@ import rospy
 
 from std_msgs.msg import Float32MultiArray
 from std_msgs.msg import Int32
-from sensor_msgs.msg import Image
+from sensor_msgs.msg import Image, CompressedImage
 from geometry_msgs.msg import Pose2D
 from pathplan_uncertainty.msg import Int32TimeStep, Pose2DTimeStep, WorldState, Observation, AgentCommand
 from pathplan_uncertainty.srv import GroundType
 from dt_simulator.world import World, DroveOffTheFreakinRoad, RammedAFreakinDuckiebot 
 from dt_simulator.visualizer import Visualizer
 from cv_bridge import CvBridge, CvBridgeError
+from timeit import default_timer as timer
+import cv2
+import numpy as np
 
 
 class SimNode(object):
@@ -23,14 +26,35 @@ class SimNode(object):
         self.dt = rospy.get_param("/sim/dt")
         self.dt_in_sim = rospy.get_param("/sim/dt_in_sim")
         self.sim_parameters = {"dt": self.dt, "dt_in_sim": self.dt_in_sim}
-
-        self.output_image = rospy.get_param("/sim/image/output_image")
+        self.mode = rospy.get_param("/sim/mode")
+        if self.mode not in ["real_time", "headless"]:
+            rospy.logerr("[SimNode] Unknown simulation mode. Look in pathplan_uncertainty/config/sim.yaml and make sure it is fine!")
+        self.headless = self.mode == "headless"
+        self.publishing = rospy.get_param("/sim/publishing")
+        if self.publishing not in ["slim", "full"]:
+            rospy.logerr("[SimNode] Unknown publishing mode. Look in pathplan_uncertainty/config/sim.yaml and make sure it is fine!")
+        self.slim_publishing = self.publishing == "slim"
+        self.publish_stats = {"steps": 0, "messages": 0, "time": 0.0, "last_step_time": 0.0}
+
+        self.output_image = rospy.get_param("/sim/image/output_image") and not self.headless
         self.image_height = rospy.get_param("/sim/image/height")
         self.image_width = rospy.get_param("/sim/image/width")
         self.image_m2pix = rospy.get_param("/sim/image/m2pix")
         self.image_y_baseline = rospy.get_param("/sim/image/y_baseline")
+        self.image_every_n_steps = rospy.get_param("/sim/image/every_n_steps")
+        self.image_only_when_subscribed = rospy.get_param("/sim/image/only_when_subscribed")
+        self.image_scale = rospy.get_param("/sim/image/scale")
+        self.image_compressed_format = rospy.get_param("/sim/image/compressed_format")
+        self.image_jpeg_quality = rospy.get_param("/sim/image/jpeg_quality")
+        if self.image_every_n_steps < 1:
+            rospy.logerr("[SimNode] image/every_n_steps must be at least 1, rendering every time step. Look in pathplan_uncertainty/config/sim.yaml and make sure it is fine!")
+            self.image_every_n_steps = 1
+        if self.image_compressed_format not in ["none", "jpeg", "png"]:
+            rospy.logerr("[SimNode] Unknown compressed image format, no compressed image is published. Look in pathplan_uncertainty/config/sim.yaml and make sure it is fine!")
+            self.image_compressed_format = "none"
 
         self.image_params = {"output_image": self.output_image, "height": self.image_height, "width": self.image_width, "m2pix": self.image_m2pix, "y_baseline": self.image_y_baseline}
+        self.image_step_count = 0
 
         ## World parameters
         self.road_width = rospy.get_param("/sim/world/road/width")
@@ -69,13 +93,15 @@ class SimNode(object):
         self.pub_pose_other_duckie = rospy.Publisher("/sim/gt/pose_other_duckie",Pose2DTimeStep, queue_size=1)
         self.pub_safety_status = rospy.Publisher("/sim/gt/our_duckie_safety_status",Int32TimeStep, queue_size=1)
         self.pub_our_duckie_ground_type = rospy.Publisher("/sim/gt/our_duckie_ground_type",Int32TimeStep, queue_size=1)
-        self.pub_world_state = rospy.Publisher("sim/gt/world_state", WorldState, queue_size=1)
+        # In headless mode, all the time steps of a command are published at once: none of them should be dropped for the manager
+        self.pub_world_state = rospy.Publisher("sim/gt/world_state", WorldState, queue_size=100 if self.headless else 1)
 
         #self.pub_pose_our_duckie_obs = rospy.Publisher("/sim/obs/pose_our_duckie",Pose2DTimeStep, queue_size=1)
         #self.pub_pose_other_duckie_obs = rospy.Publisher("/sim/obs/pose_other_duckie",Pose2DTimeStep, queue_size=1)
         self.pub_observations = rospy.Publisher("/sim/obs/observations",Observation, queue_size=1)
 
         self.pub_image = rospy.Publisher("/sim/road_image", Image, queue_size=1)
+        self.pub_compressed_image = rospy.Publisher("/sim/road_image/compressed", CompressedImage, queue_size=1)
         
         # Subscribers
         self.sub_agent_command = rospy.Subscriber("/agent/command", AgentCommand, self.agent_command_cb)
@@ -128,36 +154,22 @@ class SimNode(object):
         #rospy.loginfo("[Sim] Published observations")
 
     def publish_state(self):
-        # Publishing the state
+        # Publishing the state: the world state always, the separate topics only in full publishing mode or if they have subscribers
+        start = timer()
+        number_messages = 0
         time, ourd_p, ourd_v, ourd_ss, ourd_gt, othd_p, othd_v = self.world.get_state()
 
-         # Publish our duckie pose
         ourd_p_msg = Pose2DTimeStep()
         ourd_p_msg.time = time
         ourd_p_msg.x = ourd_p[0]
         ourd_p_msg.y = ourd_p[1]
         ourd_p_msg.theta = ourd_p[2]
-        self.pub_pose_our_duckie.publish(ourd_p_msg)
-
-        # Publish our duckie safety status
-        ourd_ss_msg = Int32TimeStep()
-        ourd_ss_msg.time = time
-        ourd_ss_msg.data = ourd_ss.value
-        self.pub_safety_status.publish(ourd_ss_msg)
-
-        # Publish our duckie ground type
-        ourd_gt_msg = Int32TimeStep()
-        ourd_gt_msg.time = time
-        ourd_gt_msg.data = ourd_gt.value
-        self.pub_our_duckie_ground_type.publish(ourd_gt_msg)
 
-        # Publish other duckie pose
         othd_p_msg = Pose2DTimeStep()
         othd_p_msg.time = time
         othd_p_msg.x = othd_p[0]
         othd_p_msg.y = othd_p[1]
         othd_p_msg.theta = othd_p[2]
-        self.pub_pose_other_duckie.publish(othd_p_msg)
 
         # Publish all together
         world_state_msg = WorldState()
@@ -167,20 +179,91 @@ class SimNode(object):
         world_state_msg.safety_status = ourd_ss.value
         world_state_msg.ground_type = ourd_gt.value
         self.pub_world_state.publish(world_state_msg)
+        number_messages += 1
+
+        # Publish our duckie pose
+        if self.publish_field(self.pub_pose_our_duckie):
+            self.pub_pose_our_duckie.publish(ourd_p_msg)
+            number_messages += 1
+
+        # Publish our duckie safety status
+        if self.publish_field(self.pub_safety_status):
+            ourd_ss_msg = Int32TimeStep()
+            ourd_ss_msg.time = time
+            ourd_ss_msg.data = ourd_ss.value
+            self.pub_safety_status.publish(ourd_ss_msg)
+            number_messages += 1
+
+        # Publish our duckie ground type
+        if self.publish_field(self.pub_our_duckie_ground_type):
+            ourd_gt_msg = Int32TimeStep()
+            ourd_gt_msg.time = time
+            ourd_gt_msg.data = ourd_gt.value
+            self.pub_our_duckie_ground_type.publish(ourd_gt_msg)
+            number_messages += 1
+
+        # Publish other duckie pose
+        if self.publish_field(self.pub_pose_other_duckie):
+            self.pub_pose_other_duckie.publish(othd_p_msg)
+            number_messages += 1
 
         # Publish image
         if self.output_image:
-            image = self.visualizer.create_image_state(ourd_p, othd_p)
+            self.publish_image(ourd_p, othd_p)
+
+        step_time = timer() - start
+        self.publish_stats["steps"] += 1
+        self.publish_stats["messages"] += number_messages
+        self.publish_stats["time"] += step_time
+        self.publish_stats["last_step_time"] = step_time
+
+    def publish_field(self, publisher):
+        return not self.slim_publishing or publisher.get_num_connections() > 0
+
+    def get_publish_stats(self):
+        # Number of steps published, messages published per step and time spent publishing per step (image included)
+        steps = self.publish_stats["steps"]
+        return {"steps": steps, "messages_per_step": self.publish_stats["messages"] / float(max(steps, 1)), "time_per_step": self.publish_stats["time"] / max(steps, 1), "last_step_time": self.publish_stats["last_step_time"]}
+
+    def publish_image(self, ourd_p, othd_p):
+        # Renders one image every image_every_n_steps time steps, and only if it is listened to (when image_only_when_subscribed)
+        self.image_step_count += 1
+        if (self.image_step_count - 1) % self.image_every_n_steps != 0:
+            return
+        publish_raw = self.pub_image.get_num_connections() > 0 or not self.image_only_when_subscribed
+        publish_compressed = self.image_compressed_format != "none" and (self.pub_compressed_image.get_num_connections() > 0 or not self.image_only_when_subscribed)
+        if not publish_raw and not publish_compressed:
+            return
+
+        image = self.visualizer.create_image_state(ourd_p, othd_p)
+        if self.image_scale != 1.0:
+            image = cv2.resize(image, None, fx=self.image_scale, fy=self.image_scale, interpolation=cv2.INTER_AREA)
+        stamp = rospy.Time.now()
+
+        if publish_raw:
             image_msg_out = self.bridge.cv2_to_imgmsg(image, "bgr8")
+            image_msg_out.header.stamp = stamp
             self.pub_image.publish(image_msg_out)
 
+        if publish_compressed:
+            if self.image_compressed_format == "jpeg":
+                _, encoded = cv2.imencode(".jpg", image, [int(cv2.IMWRITE_JPEG_QUALITY), self.image_jpeg_quality])
+            else:
+                _, encoded = cv2.imencode(".png", image)
+            compressed_msg_out = CompressedImage()
+            compressed_msg_out.header.stamp = stamp
+            compressed_msg_out.format = self.image_compressed_format
+            compressed_msg_out.data = np.array(encoded).tobytes()
+            self.pub_compressed_image.publish(compressed_msg_out)
+
 
     def propagate_action(self, orientation_seq, computation_time_steps):
         # Propagate action in world
         self.world.update_our_duckie_plan(orientation_seq)
 
         for k in range(computation_time_steps):
-            rospy.sleep(self.dt_in_sim)
+            if not self.headless:
+                rospy.sleep(self.dt_in_sim)
             self.world.step()
             self.publish_state()
 
@@ -193,6 +276,8 @@ class SimNode(object):
         return response
 
     def onShutdown(self):
+        stats = self.get_publish_stats()
+        rospy.loginfo("[SimNode] Published %d steps: %.1f messages and %.2f ms per step." % (stats["steps"], stats["messages_per_step"], 1000*stats["time_per_step"]))
         rospy.loginfo("[SimNode] Shutdown.")
 
 